@@ -1,2 +1,6 @@
 from dict_from_pypinyin.api import word_to_pinyin
 from dict_from_pypinyin.core import convert_chinese_to_pinyin
+from dict_from_pypinyin.engines import Engine
+from dict_from_pypinyin.execution import ExecutionOptions
+from dict_from_pypinyin.report import ConversionReport
+from dict_from_pypinyin.reverse_index import ReverseIndexBuilder, load_reverse_index
@@ -208,6 +208,16 @@ def parse_positive_integer(value: str) -> int:
   return value
 
 
+def parse_memory_size(value: str) -> int:
+  value = parse_non_empty(value)
+  units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+  unit = value[-1].upper()
+  if unit in units:
+    number = parse_positive_float(value[:-1])
+    return round(number * units[unit])
+  return parse_positive_integer(value)
+
+
 def parse_non_negative_integer(value: str) -> int:
   value = parse_integer(value)
   if not value >= 0:
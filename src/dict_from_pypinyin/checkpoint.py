@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pronunciation_dictionary import Pronunciations, Word
+
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.supervision import QuarantineEntry
+from dict_from_pypinyin.types import Chunk, ChunkPronunciations
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 4
+CHUNK_PREFIX = "chunk-"
+# a header line with the OOV statistics and the quarantined words followed by the pronunciations of each word (JSON lines)
+CHUNK_SUFFIX = ".jsonl"
+TMP_SUFFIX = ".tmp"
+
+
+def get_vocabulary_hash(vocabulary: Iterable[Word]) -> str:
+  hash_instance = hashlib.sha256()
+  for word in vocabulary:
+    hash_instance.update(word.encode("UTF-8"))
+    hash_instance.update(b"\n")
+  return hash_instance.hexdigest()
+
+
+def get_manifest(vocabulary_hash: str, n_words: int, chunksize: int, options: Dict[str, Any]) -> Dict[str, Any]:
+  result = {
+    "version": MANIFEST_VERSION,
+    "vocabulary_hash": vocabulary_hash,
+    "n_words": n_words,
+    "chunksize": chunksize,
+    "options": options,
+  }
+  return result
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+  tmp_path = path.parent / f"{path.name}{TMP_SUFFIX}"
+  with open(tmp_path, mode="wb") as file:
+    file.write(content)
+    file.flush()
+    os.fsync(file.fileno())
+  os.replace(tmp_path, path)
+
+
+def get_chunk_path(directory: Path, chunk: Chunk) -> Path:
+  start, end = chunk
+  return directory / f"{CHUNK_PREFIX}{start}-{end}{CHUNK_SUFFIX}"
+
+
+def get_pronunciations_content(pronunciations: Pronunciations) -> List[Any]:
+  return list(pronunciations.items())
+
+
+def parse_pronunciations_content(content: Any, name: str) -> Pronunciations:
+  """ `name` describes the word in errors """
+  if not isinstance(content, list):
+    raise ValueError(f"Pronunciations of {name} are invalid!")
+  result = OrderedDict()
+  for pronunciation in content:
+    if not (isinstance(pronunciation, list) and len(pronunciation) == 2 and isinstance(pronunciation[0], list) and all(isinstance(symbol, str) for symbol in pronunciation[0]) and isinstance(pronunciation[1], (int, float))):
+      raise ValueError(f"Pronunciation of {name} is invalid!")
+    symbols, weight = pronunciation
+    result[tuple(symbols)] = float(weight)
+  return result
+
+
+def get_pronunciations_line(word: Word, pronunciations: Pronunciations) -> str:
+  return json.dumps([word, get_pronunciations_content(pronunciations)], ensure_ascii=False) + "\n"
+
+
+def parse_pronunciations_line(line: str) -> Tuple[Word, Pronunciations]:
+  content = json.loads(line)
+  if not (isinstance(content, list) and len(content) == 2 and isinstance(content[0], str)):
+    raise ValueError("Resolved word is invalid!")
+  word, pronunciations = content
+  return word, parse_pronunciations_content(pronunciations, f"word \"{word}\"")
+
+
+def get_oov_statistics_content(oov_statistics: OOVStatistics) -> Dict[str, Any]:
+  result = {
+    "symbol_counts": dict(oov_statistics.symbol_counts),
+    "symbol_examples": oov_statistics.symbol_examples,
+  }
+  return result
+
+
+def parse_oov_statistics(content: Any) -> OOVStatistics:
+  if not (isinstance(content, dict) and isinstance(content.get("symbol_counts"), dict) and isinstance(content.get("symbol_examples"), dict)):
+    raise ValueError("OOV statistics are invalid!")
+  result = OOVStatistics()
+  for symbol, count in content["symbol_counts"].items():
+    if not isinstance(count, int):
+      raise ValueError("OOV statistics are invalid!")
+    result.symbol_counts[symbol] = count
+  for symbol, examples in content["symbol_examples"].items():
+    if not (isinstance(examples, list) and all(isinstance(example, list) and len(example) == 2 and isinstance(example[0], int) and isinstance(example[1], str) for example in examples)):
+      raise ValueError("OOV statistics are invalid!")
+    result.symbol_examples[symbol] = [(word_i, word) for word_i, word in examples]
+  return result
+
+
+def save_chunk(directory: Path, chunk: Chunk, pronunciations: ChunkPronunciations, oov_statistics: OOVStatistics, failures: Optional[Dict[int, QuarantineEntry]] = None) -> None:
+  """ saves the results of the chunk together with the words that were quarantined in it (index -> reason and details); the content is only parsed on loading, not unpickled """
+  if failures is None:
+    failures = {}
+  header = {
+    "oov_statistics": get_oov_statistics_content(oov_statistics),
+    "failures": [[word_i, reason, details] for word_i, (reason, details) in sorted(failures.items())],
+  }
+  lines = [json.dumps(header, ensure_ascii=False) + "\n"]
+  lines.extend(
+    json.dumps(get_pronunciations_content(word_pronunciations), ensure_ascii=False) + "\n"
+    for word_pronunciations in pronunciations
+  )
+  write_atomic(get_chunk_path(directory, chunk), "".join(lines).encode("UTF-8"))
+
+
+def load_chunk(directory: Path, chunk: Chunk) -> Tuple[ChunkPronunciations, OOVStatistics, Dict[int, QuarantineEntry]]:
+  path = get_chunk_path(directory, chunk)
+  start, end = chunk
+  with path.open("r", encoding="UTF-8", newline="\n") as file:
+    header = json.loads(file.readline())
+    if not (isinstance(header, dict) and isinstance(header.get("failures"), list)):
+      raise ValueError(f"Checkpoint chunk \"{path}\" is invalid!")
+    oov_statistics = parse_oov_statistics(header.get("oov_statistics"))
+    failures = {}
+    for failure in header["failures"]:
+      if not (isinstance(failure, list) and len(failure) == 3 and isinstance(failure[0], int) and all(isinstance(value, str) for value in failure[1:])):
+        raise ValueError(f"Checkpoint chunk \"{path}\" is invalid!")
+      word_i, reason, details = failure
+      failures[word_i] = (reason, details)
+    pronunciations = [
+      parse_pronunciations_content(json.loads(line), f"word {word_i}")
+      for word_i, line in enumerate(file, start=start)
+    ]
+  if len(pronunciations) != end - start:
+    raise ValueError(f"Checkpoint chunk \"{path}\" is incomplete!")
+  return pronunciations, oov_statistics, failures
+
+
+def get_saved_chunks(directory: Path) -> Set[Chunk]:
+  result = set()
+  for path in directory.glob(f"{CHUNK_PREFIX}*{CHUNK_SUFFIX}"):
+    parts = path.name[len(CHUNK_PREFIX):-len(CHUNK_SUFFIX)].split("-")
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+      continue
+    result.add((int(parts[0]), int(parts[1])))
+  return result
+
+
+def try_load_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+  path = directory / MANIFEST_NAME
+  if not path.is_file():
+    return None
+  try:
+    result = json.loads(path.read_text("UTF-8"))
+  except ValueError:
+    return None
+  return result
+
+
+def clear_checkpoint_dir(directory: Path) -> None:
+  for chunk in get_saved_chunks(directory):
+    os.remove(get_chunk_path(directory, chunk))
+  for path in directory.glob(f"*{TMP_SUFFIX}"):
+    os.remove(path)
+  manifest_path = directory / MANIFEST_NAME
+  if manifest_path.is_file():
+    os.remove(manifest_path)
+
+
+def prepare_checkpoint_dir(directory: Path, manifest: Dict[str, Any], resume: bool) -> Set[Chunk]:
+  """ returns the chunks that were already completed in a previous run """
+  logger = getLogger(__name__)
+  directory.mkdir(parents=True, exist_ok=True)
+
+  if resume:
+    existing_manifest = try_load_manifest(directory)
+    if existing_manifest is None:
+      logger.info("No checkpoint found to resume from, starting from scratch.")
+    elif existing_manifest != manifest:
+      raise ValueError(
+        "Checkpoint was created from a different vocabulary or with different options!")
+    else:
+      completed_chunks = get_saved_chunks(directory)
+      logger.info(f"Resuming from checkpoint with {len(completed_chunks)} completed chunk(s).")
+      return completed_chunks
+
+  clear_checkpoint_dir(directory)
+  content = json.dumps(manifest, ensure_ascii=False, indent=2).encode("UTF-8")
+  write_atomic(directory / MANIFEST_NAME, content)
+  return set()
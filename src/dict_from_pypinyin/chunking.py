@@ -0,0 +1,40 @@
+from typing import Dict, List, Optional, Tuple
+
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.types import Chunk, ChunkPronunciations
+
+
+def get_chunks(n_words: int, chunksize: int) -> List[Chunk]:
+  result = [
+    (start, min(start + chunksize, n_words))
+    for start in range(0, n_words, chunksize)
+  ]
+  return result
+
+
+class ChunkAssembler():
+  """ Collects the pronunciations of parts of chunks and returns a chunk once all of its parts are completed. """
+
+  def __init__(self, chunks: List[Chunk]) -> None:
+    self.__parts: Dict[Chunk, Dict[int, ChunkPronunciations]] = {chunk: {} for chunk in chunks}
+    self.__missing_words: Dict[Chunk, int] = {(start, end): end - start for start, end in chunks}
+    self.__oov_statistics: Dict[Chunk, OOVStatistics] = {chunk: OOVStatistics() for chunk in chunks}
+
+  def add(self, chunk: Chunk, part: Chunk, part_pronunciations: ChunkPronunciations, part_oov_statistics: OOVStatistics) -> Optional[Tuple[Chunk, ChunkPronunciations, OOVStatistics]]:
+    start, end = part
+    assert chunk[0] <= start < end <= chunk[1]
+    assert len(part_pronunciations) == end - start
+    self.__parts[chunk][start] = part_pronunciations
+    self.__oov_statistics[chunk].update(part_oov_statistics)
+    self.__missing_words[chunk] -= end - start
+    if self.__missing_words[chunk] > 0:
+      return None
+    parts = self.__parts.pop(chunk)
+    del self.__missing_words[chunk]
+    oov_statistics = self.__oov_statistics.pop(chunk)
+    result = [
+      pronunciations
+      for part_start in sorted(parts)
+      for pronunciations in parts[part_start]
+    ]
+    return chunk, result, oov_statistics
@@ -10,6 +10,8 @@ from typing import Callable, Generator, List, Tuple
 
 from dict_from_pypinyin.logging_configuration import configure_root_logger
 from dict_from_pypinyin.main import get_app_try_add_vocabulary_from_pronunciations_parser
+from dict_from_pypinyin.sharding_main import (get_merge_parser, get_run_locally_parser,
+                                              get_run_shard_parser, get_split_parser)
 
 PROG_NAME = "dict-from-pypinyin"
 __version__ = version(PROG_NAME)
@@ -35,6 +37,28 @@ def _init_parser():
   return main_parser
 
 
+def get_sharding_parsers() -> Parsers:
+  yield "split", "split the vocabulary into shards", get_split_parser
+  yield "run-shard", "create the dictionary of one shard", get_run_shard_parser
+  yield "run-local", "create the dictionaries of all shards in separate processes on this machine", get_run_locally_parser
+  yield "merge", "merge the dictionaries of the shards", get_merge_parser
+
+
+def _init_sharding_parser():
+  main_parser = ArgumentParser(formatter_class=formatter)
+  main_parser.description = "Command-line interface (CLI) to create a pronunciation dictionary of a large vocabulary in shards, which can be processed independently, e.g., on multiple machines."
+  main_parser.add_argument('-v', '--version', action='version', version='%(prog)s ' + __version__)
+  subparsers = main_parser.add_subparsers(help="description")
+  for command, description, method in get_sharding_parsers():
+    method_parser = subparsers.add_parser(command, help=description, formatter_class=formatter)
+    invoke_method = method(method_parser)
+    method_parser.set_defaults(**{
+      INVOKE_HANDLER_VAR: invoke_method,
+    })
+
+  return main_parser
+
+
 def configure_logger(productive: bool) -> None:
   loglevel = logging.INFO if productive else logging.DEBUG
   main_logger = getLogger()
@@ -54,7 +78,7 @@ def configure_logger(productive: bool) -> None:
   console.setLevel(loglevel)
 
 
-def parse_args(args: List[str]):
+def parse_args(args: List[str], init_parser: Callable[[], ArgumentParser] = _init_parser):
   configure_root_logger()
 
   root_logger = getLogger()
@@ -63,7 +87,7 @@ def parse_args(args: List[str]):
   if local_debugging:
     root_logger.debug(f"Received arguments: {str(args)}")
 
-  parser = _init_parser()
+  parser = init_parser()
 
   if len(args) == 0:
     parser.print_help()
@@ -101,5 +125,14 @@ def run_prod():
   run()
 
 
+def run_sharding():
+  arguments = sys.argv[1:]
+  parse_args(arguments, _init_sharding_parser)
+
+
+def run_sharding_prod():
+  run_sharding()
+
+
 if __name__ == "__main__":
   run_prod()
@@ -0,0 +1,125 @@
+import itertools
+from collections import OrderedDict
+from typing import Callable, Generator, Iterable, List, Optional, Tuple
+
+from pronunciation_dictionary import Pronunciation, Pronunciations, Weight, Word
+from word_to_pronunciation import Options
+from word_to_pronunciation.core import HYPHEN, join_begin_and_end
+from word_to_pronunciation.utils import separate_symbols
+
+from dict_from_pypinyin.frequencies import iterate_pruned_combinations
+
+PartLookupMethod = Callable[[Word], Pronunciations]
+
+
+def get_separated_symbols(word: Word, symbols: str) -> Tuple[str, Word, str]:
+  """ same as `separate_symbols` but without compiling a pattern for each word """
+  if "\n" in word:
+    # the pattern of `separate_symbols` doesn't match line breaks
+    return separate_symbols(word, symbols)
+  core_and_end = word.lstrip(symbols)
+  core = core_and_end.rstrip(symbols)
+  return word[:len(word) - len(core_and_end)], core, core_and_end[len(core):]
+
+
+def join_parts(parts: List[Optional[Pronunciations]], combination: Iterable[Tuple[Pronunciation, Weight]]) -> Tuple[Pronunciation, Optional[Weight]]:
+  """ joins one pronunciation of each looked up part by hyphens and multiplies their weights (None if all parts are empty) """
+  pronunciation = []
+  weight = None
+  part_pronunciations = iter(combination)
+  last_part_i = len(parts) - 1
+  for part_i, part in enumerate(parts):
+    if part is not None:
+      part_pronunciation, part_weight = next(part_pronunciations)
+      pronunciation.extend(part_pronunciation)
+      weight = part_weight if weight is None else weight * part_weight
+    if part_i < last_part_i:
+      pronunciation.append(HYPHEN)
+  return tuple(pronunciation), weight
+
+
+def iterate_combinations(parts: List[Optional[Pronunciations]]) -> Generator[Tuple[Pronunciation, Optional[Weight]], None, None]:
+  """
+  Yields the pronunciations of all combinations of the pronunciations of the parts (joined by hyphens; empty parts are None) together with the product of their weights (None if all parts are empty).
+  """
+  looked_up_parts = [part for part in parts if part is not None]
+  for combination in itertools.product(*(part.items() for part in looked_up_parts)):
+    yield join_parts(parts, combination)
+
+
+def iterate_pruned_part_combinations(parts: List[Optional[Pronunciations]], top_k: Optional[int], cumulative_probability: Optional[float]) -> Generator[Tuple[Pronunciation, Optional[Weight]], None, None]:
+  """
+  Yields the same as `iterate_combinations` but in descending order of their weight and, if `top_k` or `cumulative_probability` is set, only the most probable combinations (see `iterate_pruned_combinations`); the weights of each part are normalized to probabilities first.
+  """
+  looked_up_parts = []
+  probabilities = []
+  for part in parts:
+    if part is None:
+      continue
+    part_items = sorted(part.items(), key=lambda item: -item[1])
+    total = sum(part_weight for _, part_weight in part_items)
+    looked_up_parts.append(part_items)
+    probabilities.append([part_weight / total if total > 0 else 0.0 for _, part_weight in part_items])
+  for indices, _ in iterate_pruned_combinations(probabilities, top_k, cumulative_probability):
+    yield join_parts(parts, (part_items[index] for index, part_items in zip(indices, looked_up_parts)))
+
+
+def merge_parts(parts: List[Optional[Pronunciations]], default_weight: Optional[Weight], top_k: Optional[int] = None, cumulative_probability: Optional[float] = None, best_first: bool = False) -> Pronunciations:
+  if not best_first and top_k is None and cumulative_probability is None:
+    combinations = iterate_combinations(parts)
+  else:
+    # the parts are already pruned but the amount of their combinations grows exponentially with the amount of parts
+    combinations = iterate_pruned_part_combinations(parts, top_k, cumulative_probability)
+  result = OrderedDict()
+  for pronunciation, weight in combinations:
+    if len(pronunciation) == 0:
+      continue
+    if weight is None:
+      assert default_weight is not None
+      weight = default_weight
+    result[pronunciation] = weight
+  return result
+
+
+def get_compound_pronunciations(word: Word, lookup: PartLookupMethod, options: Options, top_k: Optional[int] = None, cumulative_probability: Optional[float] = None, best_first: bool = False) -> Pronunciations:
+  """
+  Returns the same pronunciations as `word_to_pronunciation.get_pronunciations_from_word`; the lookup results are copied so that they can be cached.
+  If `best_first` is set, the combinations of the parts of a word that is split on hyphens are returned in descending order of their weight.
+  If `top_k` or `cumulative_probability` is set, only the most probable of these combinations are returned (in descending order of their weight).
+  """
+  if word == "":
+    return OrderedDict()
+
+  if len(options.trim_symbols) > 0 and options.try_without_trimming:
+    lookup_result = lookup(word)
+    if len(lookup_result) > 0:
+      return OrderedDict(lookup_result)
+
+  if len(options.trim_symbols) > 0:
+    trim_beginning, word_core, trim_end = get_separated_symbols(word, options.trim_symbols)
+    if word_core == "":
+      return OrderedDict(((tuple(word), options.default_weight),))
+  else:
+    trim_beginning, word_core, trim_end = "", word, ""
+
+  if options.split_on_hyphen and options.try_without_splitting:
+    lookup_result = lookup(word_core)
+    if len(lookup_result) > 0:
+      return join_begin_and_end(OrderedDict(lookup_result), trim_beginning, trim_end)
+
+  if options.split_on_hyphen:
+    parts = []
+    for part in word_core.split(HYPHEN):
+      if part == "":
+        parts.append(None)
+        continue
+      lookup_result = lookup(part)
+      if len(lookup_result) == 0:
+        return OrderedDict()
+      parts.append(lookup_result)
+    lookup_result = merge_parts(parts, options.default_weight, top_k,
+                                cumulative_probability, best_first)
+  else:
+    lookup_result = OrderedDict(lookup(word_core))
+
+  return join_begin_and_end(lookup_result, trim_beginning, trim_end)
@@ -1,16 +1,45 @@
 import os
 from collections import OrderedDict
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache, partial
+from logging import getLogger
 from multiprocessing.pool import Pool
-from typing import Any, Dict, Optional, Set, Tuple
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import (Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Sequence,
+                    Set, Tuple)
 
 from ordered_set import OrderedSet
 from pronunciation_dictionary import PronunciationDict, Pronunciations, Word
 from pypinyin import Style
 from tqdm import tqdm
-from word_to_pronunciation import Options, get_pronunciations_from_word
+from word_to_pronunciation import Options
+from word_to_pronunciation.api import lookup_with_check
 
-from dict_from_pypinyin.transcription import word_to_pinyin
+from dict_from_pypinyin.checkpoint import get_manifest, get_vocabulary_hash, prepare_checkpoint_dir
+from dict_from_pypinyin.chunking import get_chunks
+from dict_from_pypinyin.compounds import get_compound_pronunciations
+from dict_from_pypinyin.engines import Engine, get_executor_submit_method, get_pool_submit_method
+from dict_from_pypinyin.execution import ExecutionOptions
+from dict_from_pypinyin.frequencies import FrequencyWeighting
+from dict_from_pypinyin.memory import (SIZE_SAMPLES, get_chunksize_within_budget, get_current_rss,
+                                       get_max_workers, get_peak_rss,
+                                       get_pronunciations_within_budget)
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.ordering import ChunkMerger, ReorderStatistics, get_ordered_results
+from dict_from_pypinyin.prefilter import prefilter_vocabulary
+from dict_from_pypinyin.profiling import merge_profiles, prepare_profile_dir, profile_chunk
+from dict_from_pypinyin.report import ConversionReport
+from dict_from_pypinyin.reverse_index import ReverseIndexBuilder
+from dict_from_pypinyin.supervision import (QuarantineEntry, get_failure_reason,
+                                            get_pronunciations_supervised)
+from dict_from_pypinyin.transcription import (SyllableTranscriptionError, word_to_pinyin,
+                                              word_to_weighted_pinyin)
+from dict_from_pypinyin.types import Chunk, ChunkPronunciations, ChunkResult, Writer
+
+EMPTY_PRONUNCIATIONS: Pronunciations = OrderedDict()
 
 
 def validate_type(obj: Any, t: type) -> None:
@@ -25,7 +54,10 @@ def validate_exact_type(obj: Any, t: type) -> None:
 
 
 def convert_chinese_to_pinyin(vocabulary: OrderedSet[Word], style: Style = Style.TONE3, v_to_u: bool = True, strict: bool = True, neutral_tone_with_five: bool = True, weight: float = 1.0,
-                              trim_symbols: Optional[Set[str]] = None, split_on_hyphen: bool = True, n_jobs: int = os.cpu_count(), maxtasksperchild: Optional[int] = None, chunksize: int = 100_000, silent: bool = True) -> Tuple[PronunciationDict, OrderedSet[Word]]:
+                              trim_symbols: Optional[Set[str]] = None, split_on_hyphen: bool = True, n_jobs: int = os.cpu_count(), maxtasksperchild: Optional[int] = None, chunksize: int = 100_000, silent: bool = True,
+                              report: Optional[ConversionReport] = None, weight_by_frequency: bool = False, top_k: Optional[int] = None, cumulative_probability: Optional[float] = None,
+                              writer: Optional[Writer] = None, try_without_trimming: bool = False, try_without_splitting: bool = False, reverse_index: Optional[ReverseIndexBuilder] = None,
+                              execution: Optional[ExecutionOptions] = None) -> Tuple[PronunciationDict, OrderedSet[Word]]:
   validate_exact_type(vocabulary, OrderedSet)
   if trim_symbols is None:
     trim_symbols = set()
@@ -36,100 +68,454 @@ def convert_chinese_to_pinyin(vocabulary: OrderedSet[Word], style: Style = Style
     raise ValueError("Style not found!")
   validate_type(trim_symbols, set)
   validate_type(split_on_hyphen, bool)
+  validate_type(try_without_trimming, bool)
+  validate_type(try_without_splitting, bool)
   validate_type(n_jobs, int)
   validate_type(chunksize, int)
   if maxtasksperchild is not None:
     validate_type(maxtasksperchild, int)
   validate_type(silent, bool)
+  if report is not None:
+    validate_type(report, ConversionReport)
+  validate_type(weight_by_frequency, bool)
+  if top_k is not None:
+    validate_type(top_k, int)
+    if not top_k > 0:
+      raise ValueError("Top-k needs to be greater than zero!")
+  if cumulative_probability is not None:
+    validate_type(cumulative_probability, float)
+    if not 0 < cumulative_probability <= 1:
+      raise ValueError("Cumulative probability needs to be in (0, 1]!")
+  if (top_k is not None or cumulative_probability is not None) and not weight_by_frequency:
+    raise ValueError("Pruning requires weighting by frequency!")
+  # if a writer is given, it receives the resolved words in order of the vocabulary as soon as possible and the returned dictionary stays empty
+  if writer is not None and not callable(writer):
+    raise ValueError("Writer needs to be callable!")
+  # if a builder is given, it receives the pronunciations of the resolved words together with their indices in the vocabulary
+  if reverse_index is not None:
+    validate_type(reverse_index, ReverseIndexBuilder)
+  if execution is None:
+    execution = ExecutionOptions()
+  validate_execution_options(execution)
 
   trim = ''.join(trim_symbols)
-  options = Options(trim, split_on_hyphen, False, False, weight)
+  options = Options(trim, split_on_hyphen, try_without_trimming, try_without_splitting, weight)
+  frequency_weighting = FrequencyWeighting(
+    top_k, cumulative_probability) if weight_by_frequency else None
 
   dictionary_instance, unresolved_words = get_pronunciations(
-    vocabulary, style, v_to_u, strict, neutral_tone_with_five, weight, options, n_jobs, maxtasksperchild, chunksize, silent)
+    vocabulary, style, v_to_u, strict, neutral_tone_with_five, weight, options, n_jobs, maxtasksperchild, chunksize, silent, execution, report, frequency_weighting, writer, reverse_index)
   return dictionary_instance, unresolved_words
 
 
-def get_pronunciations(vocabulary: OrderedSet[Word], style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, n_jobs: int, maxtasksperchild: Optional[int], chunksize: int, silent: bool) -> Tuple[PronunciationDict, OrderedSet[Word]]:
-  lookup_method = partial(
-    process_get_pronunciation,
-    weight=weight,
-    style=style,
-    v_to_u=v_to_u,
-    strict=strict,
-    neutral_tone_with_five=neutral_tone_with_five,
-    options=options,
-  )
+def validate_execution_options(execution: ExecutionOptions) -> None:
+  validate_type(execution, ExecutionOptions)
+  if execution.engine not in list(Engine):
+    raise ValueError("Engine not found!")
+  if execution.max_buffered_chunks is not None:
+    validate_type(execution.max_buffered_chunks, int)
+    if not execution.max_buffered_chunks > 0:
+      raise ValueError("Maximum of buffered chunks needs to be greater than zero!")
+  if execution.checkpoint_dir is not None:
+    validate_type(execution.checkpoint_dir, Path)
+  validate_type(execution.resume, bool)
+  if execution.resume and execution.checkpoint_dir is None:
+    raise ValueError("Resuming requires a checkpoint directory!")
+  validate_type(execution.supervised, bool)
+  if execution.supervised and execution.engine != Engine.PROCESSES:
+    raise ValueError("Supervised execution requires the process engine!")
+  if execution.chunk_timeout is not None:
+    validate_type(execution.chunk_timeout, float)
+    if not execution.supervised:
+      raise ValueError("Chunk timeouts require supervised execution!")
+  if execution.max_memory is not None:
+    validate_type(execution.max_memory, int)
+    if not execution.max_memory > 0:
+      raise ValueError("Memory budget needs to be greater than zero!")
+  if execution.profile_dir is not None:
+    validate_type(execution.profile_dir, Path)
+    if execution.engine != Engine.PROCESSES:
+      raise ValueError("Profiling requires the process engine!")
+  validate_type(execution.profile_collapsed_stacks, bool)
+  if execution.profile_collapsed_stacks and execution.profile_dir is None:
+    raise ValueError("Collapsed stacks require a profile directory!")
+
+
+def get_checkpoint_options(style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, frequency_weighting: Optional[FrequencyWeighting] = None) -> Dict[str, Any]:
+  result = {
+    "style": style.name,
+    "v_to_u": v_to_u,
+    "strict": strict,
+    "neutral_tone_with_five": neutral_tone_with_five,
+    "weight": weight,
+    "trim_symbols": "".join(sorted(options.trim_symbols)),
+    "split_on_hyphen": options.split_on_hyphen,
+    "try_without_trimming": options.try_without_trimming,
+    "try_without_splitting": options.try_without_splitting,
+    "frequency_weighting": None if frequency_weighting is None else frequency_weighting._asdict(),
+  }
+  return result
+
+
+def get_pronunciations(vocabulary: OrderedSet[Word], style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, n_jobs: int, maxtasksperchild: Optional[int], chunksize: int, silent: bool, execution: ExecutionOptions = ExecutionOptions(), report: Optional[ConversionReport] = None, frequency_weighting: Optional[FrequencyWeighting] = None, writer: Optional[Writer] = None, reverse_index: Optional[ReverseIndexBuilder] = None) -> Tuple[PronunciationDict, OrderedSet[Word]]:
+  # words without hanzi are resolved by trimming and splitting alone and therefore not dispatched
+  dispatched_words, dispatched_indices, prefiltered_pronunciations, prefilter_oov_statistics = prefilter_vocabulary(
+    vocabulary, options)
+  logger = getLogger(__name__)
+  lookup_kwargs = {
+    "style": style,
+    "v_to_u": v_to_u,
+    "strict": strict,
+    "neutral_tone_with_five": neutral_tone_with_five,
+    "weight": weight,
+    "options": options,
+    "frequency_weighting": frequency_weighting,
+  }
+
+  worker_rss = None
+  if execution.max_memory is not None and len(dispatched_words) > 0:
+    n_jobs, chunksize, worker_rss = get_execution_within_budget(
+      dispatched_words, n_jobs, chunksize, execution, lookup_kwargs)
+  chunks = get_chunks(len(dispatched_words), chunksize)
+
+  completed_chunks: Set[Chunk] = set()
+  if execution.checkpoint_dir is not None:
+    manifest = get_manifest(
+      get_vocabulary_hash(vocabulary), len(vocabulary), chunksize,
+      get_checkpoint_options(**lookup_kwargs),
+    )
+    completed_chunks = prepare_checkpoint_dir(execution.checkpoint_dir, manifest, execution.resume)
+  pending_chunks = [chunk for chunk in chunks if chunk not in completed_chunks]
+  completed_words = sum(end - start for start, end in chunks if (start, end) in completed_chunks)
+  completed_words += len(vocabulary) - len(dispatched_words)
 
-  with Pool(
-    processes=n_jobs,
-    initializer=__init_pool_prepare_cache_mp,
-    initargs=(vocabulary,),
-    maxtasksperchild=maxtasksperchild,
-  ) as pool:
-    entries = range(len(vocabulary))
-    iterator = pool.imap(lookup_method, entries, chunksize)
-    pronunciations_to_i = dict(tqdm(iterator, total=len(entries), unit="words", disable=silent))
+  statistics = ReorderStatistics()
+  quarantine: Dict[int, QuarantineEntry] = {}
+  oov_statistics = OOVStatistics()
+  oov_statistics.update(prefilter_oov_statistics)
+  started = perf_counter()
+  with ExitStack() as stack:
+    spill_dir = None
+    if execution.checkpoint_dir is None and execution.max_memory is not None:
+      # chunks that wait for an earlier one are spilled to a temporary directory if the memory budget is near
+      spill_dir = Path(stack.enter_context(TemporaryDirectory(prefix="dict-from-pypinyin-")))
+    merger = ChunkMerger(chunks, statistics, quarantine, completed_chunks,
+                         execution.checkpoint_dir, execution.max_memory, spill_dir)
+    results = get_chunk_results(stack, dispatched_words, pending_chunks, n_jobs,
+                                maxtasksperchild, execution, lookup_kwargs, worker_rss, merger)
+    progress_bar = stack.enter_context(
+      tqdm(total=len(vocabulary), initial=completed_words, unit="words", disable=silent))
 
-  return get_dictionary(pronunciations_to_i, vocabulary)
+    def on_received(chunk: Chunk) -> None:
+      start, end = chunk
+      progress_bar.update(end - start)
 
+    # without supervision and memory budget, the results were already saved on completion
+    save_received = execution.supervised or execution.max_memory is not None
+    ordered_results = merger.merge(results, save_received, on_received)
+    result = get_dictionary(get_remapped_pronunciations(ordered_results, dispatched_indices, oov_statistics), vocabulary,
+                            dispatched_indices, prefiltered_pronunciations, writer, reverse_index)
 
-def get_dictionary(pronunciations_to_i: Dict[int, Pronunciations], vocabulary: OrderedSet[Word]) -> Tuple[PronunciationDict, OrderedSet[Word]]:
+  if execution.profile_dir is not None and not merge_profiles(execution.profile_dir):
+    logger.warning("No chunk was profiled!")
+  if len(quarantine) > 0:
+    logger.warning(f"{len(quarantine)} word(s) were quarantined!")
+  if report is not None:
+    report.quarantined_words = OrderedDict(
+      (dispatched_words[word_i], quarantine[word_i])
+      for word_i in sorted(quarantine)
+    )
+    report.oov_statistics = oov_statistics
+    report.peak_rss = get_peak_rss()
+    # worker threads are part of the main process
+    report.peak_worker_rss = get_peak_rss(children=True) if execution.engine == Engine.PROCESSES else None
+    report.duration = perf_counter() - started
+    report.head_of_line_wait = statistics.head_of_line_wait
+    report.max_buffered_chunks = statistics.max_buffered_chunks
+  return result
+
+
+def get_execution_within_budget(words: List[Word], n_jobs: int, chunksize: int, execution: ExecutionOptions, lookup_kwargs: Dict[str, Any]) -> Tuple[int, int, Optional[int]]:
+  """ limits the amount of jobs and the chunk size to those that fit into the memory budget; returns them together with the resident set size of a worker """
+  logger = getLogger(__name__)
+  try:
+    worker_rss, sample_pronunciations = probe_memory_usage(
+      words, execution.engine, execution.chunk_timeout, **lookup_kwargs)
+  except Exception as error:  # pylint: disable=broad-except
+    logger.warning(
+      f"Memory usage couldn't be probed ({type(error).__name__}), therefore the amount of jobs and the chunk size are kept!")
+    return n_jobs, chunksize, None
+  n_jobs = get_max_workers(execution.max_memory, n_jobs, worker_rss)
+  chunksize = get_chunksize_within_budget(execution.max_memory, chunksize, sample_pronunciations)
+  logger.info(
+    f"Using {n_jobs} job(s) and a chunk size of {chunksize} to stay within the memory budget.")
+  return n_jobs, chunksize, worker_rss
+
+
+def get_chunk_results(stack: ExitStack, words: List[Word], chunks: List[Chunk], n_jobs: int, maxtasksperchild: Optional[int], execution: ExecutionOptions, lookup_kwargs: Dict[str, Any], worker_rss: Optional[int], merger: ChunkMerger) -> Iterator[ChunkResult]:
+  """ starts the workers of the engine in `stack` and returns the results of the chunks in order of completion (or in order of `chunks`) """
+  if execution.engine == Engine.THREADS:
+    # threads share the vocabulary, therefore no process-global state is needed
+    chunk_method = partial(get_chunk_pronunciations, words)
+  elif execution.supervised:
+    chunk_method = process_get_pronunciations_supervised
+  else:
+    chunk_method = process_get_pronunciations
+  lookup_method = partial(chunk_method, **lookup_kwargs)
+  if execution.profile_dir is not None:
+    # the work happens in the workers, therefore each chunk is profiled there
+    prepare_profile_dir(execution.profile_dir)
+    lookup_method = partial(profile_chunk, lookup_method,
+                            execution.profile_dir, execution.profile_collapsed_stacks)
+
+  if execution.supervised:
+    return get_pronunciations_supervised(
+      lookup_method, chunks, n_jobs, execution.chunk_timeout, maxtasksperchild,
+      __init_pool_prepare_cache_mp, (words,), merger.quarantine,
+    )
+  if execution.engine == Engine.THREADS:
+    executor = stack.enter_context(ThreadPoolExecutor(max_workers=n_jobs))
+    submit = get_executor_submit_method(executor, lookup_method)
+  else:
+    pool = stack.enter_context(Pool(
+      processes=n_jobs,
+      initializer=__init_pool_prepare_cache_mp,
+      initargs=(words,),
+      maxtasksperchild=maxtasksperchild,
+    ))
+    submit = get_pool_submit_method(pool, lookup_method)
+  if execution.max_memory is not None:
+    return get_pronunciations_within_budget(submit, chunks, n_jobs, execution.max_memory, worker_rss or 0)
+  max_buffered_chunks = execution.max_buffered_chunks
+  if max_buffered_chunks is None:
+    # two chunks per worker keep the workers busy while the next chunk in order is awaited
+    max_buffered_chunks = 2 * n_jobs
+  # chunks are saved as soon as they complete, not only once they are in order
+  return get_ordered_results(submit, chunks, max_buffered_chunks, merger.statistics, on_completed=merger.save)
+
+
+def get_remapped_pronunciations(ordered_results: Iterable[ChunkResult], dispatched_indices: Sequence[int], oov_statistics: OOVStatistics) -> Generator[Tuple[Chunk, ChunkPronunciations], None, None]:
+  """ adds the OOV statistics of the chunks to `oov_statistics` with the indices of the words in the vocabulary """
+  for chunk, chunk_pronunciations, chunk_oov_statistics in ordered_results:
+    chunk_oov_statistics.remap_indices(dispatched_indices)
+    oov_statistics.update(chunk_oov_statistics)
+    yield chunk, chunk_pronunciations
+
+
+def get_dictionary(ordered_pronunciations: Iterable[Tuple[Chunk, ChunkPronunciations]], vocabulary: OrderedSet[Word], dispatched_indices: Sequence[int], prefiltered_pronunciations: Dict[int, Pronunciations], writer: Optional[Writer] = None, reverse_index: Optional[ReverseIndexBuilder] = None) -> Tuple[PronunciationDict, OrderedSet[Word]]:
   resulting_dict = OrderedDict()
   unresolved_words = OrderedSet()
 
-  for i, word in enumerate(vocabulary):
-    pronunciations = pronunciations_to_i[i]
+  def get_dispatched_pronunciations() -> Generator[Tuple[int, Pronunciations], None, None]:
+    for (start, end), chunk_pronunciations in ordered_pronunciations:
+      assert len(chunk_pronunciations) == end - start
+      for dispatched_i, pronunciations in enumerate(chunk_pronunciations, start=start):
+        yield dispatched_indices[dispatched_i], pronunciations
 
+  dispatched_pronunciations = get_dispatched_pronunciations()
+  next_dispatched_i, next_pronunciations = next(dispatched_pronunciations, (None, None))
+  for word_i, word in enumerate(vocabulary):
+    if word_i == next_dispatched_i:
+      pronunciations = next_pronunciations
+      next_dispatched_i, next_pronunciations = next(dispatched_pronunciations, (None, None))
+    else:
+      pronunciations = prefiltered_pronunciations.get(word_i, EMPTY_PRONUNCIATIONS)
     if len(pronunciations) == 0:
       unresolved_words.add(word)
       continue
+    if reverse_index is not None:
+      reverse_index.add(word_i, word, pronunciations)
+    if writer is not None:
+      writer(word, pronunciations)
+      continue
     assert word not in resulting_dict
     resulting_dict[word] = pronunciations
 
   return resulting_dict, unresolved_words
 
 
-process_unique_words: OrderedSet[Word] = None
+def probe_memory_usage(words: List[Word], engine: Engine, timeout: Optional[float], style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, frequency_weighting: Optional[FrequencyWeighting] = None) -> Tuple[Optional[int], ChunkPronunciations]:
+  """ looks up a sample of the words in a worker and returns its resident set size afterwards (zero for threads, None if unknown) together with the pronunciations of the sample """
+  step = max(1, len(words) // SIZE_SAMPLES)
+  sample_indices = list(range(0, len(words), step))[:SIZE_SAMPLES]
+  lookup_args = (style, v_to_u, strict, neutral_tone_with_five, weight, options, frequency_weighting)
+  if engine == Engine.THREADS:
+    # threads are part of the main process
+    sample = [words[word_i] for word_i in sample_indices]
+    _, sample_pronunciations, _ = get_chunk_pronunciations(sample, (0, len(sample)), *lookup_args)
+    return 0, sample_pronunciations
+  with Pool(processes=1, initializer=__init_pool_prepare_cache_mp, initargs=(words,)) as pool:
+    result = pool.apply_async(process_probe_memory_usage, (sample_indices, *lookup_args))
+    return result.get(timeout)
+
+
+process_unique_words: List[Word] = None
 
 
-def __init_pool_prepare_cache_mp(words: OrderedSet[Word]) -> None:
+def __init_pool_prepare_cache_mp(words: List[Word]) -> None:
   global process_unique_words
   process_unique_words = words
 
 
-def process_get_pronunciation(word_i: int, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options) -> Tuple[int, Pronunciations]:
+def process_get_pronunciations(chunk: Chunk, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, frequency_weighting: Optional[FrequencyWeighting] = None) -> ChunkResult:
   global process_unique_words
-  assert 0 <= word_i < len(process_unique_words)
-  word = process_unique_words[word_i]
+  return get_chunk_pronunciations(process_unique_words, chunk, style, v_to_u, strict, neutral_tone_with_five, weight, options, frequency_weighting)
 
-  # TODO support all entries; also create all combinations with hyphen then
+
+def process_probe_memory_usage(sample_indices: List[int], style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, frequency_weighting: Optional[FrequencyWeighting] = None) -> Tuple[Optional[int], ChunkPronunciations]:
+  global process_unique_words
+  sample = [process_unique_words[word_i] for word_i in sample_indices]
+  _, sample_pronunciations, _ = get_chunk_pronunciations(
+    sample, (0, len(sample)), style, v_to_u, strict, neutral_tone_with_five, weight, options, frequency_weighting)
+  return get_current_rss(), sample_pronunciations
+
+
+def process_get_pronunciations_supervised(chunk: Chunk, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, frequency_weighting: Optional[FrequencyWeighting] = None) -> Tuple[Chunk, ChunkPronunciations, OOVStatistics, Dict[int, QuarantineEntry]]:
+  global process_unique_words
+  return get_chunk_pronunciations_supervised(process_unique_words, chunk, style, v_to_u, strict, neutral_tone_with_five, weight, options, frequency_weighting)
+
+
+# amount of parts whose lookup results are cached per configuration (in each worker); parts of hyphenated compounds repeat across the vocabulary
+MAX_CACHED_PARTS = 2**15
+
+PartLookupMethod = Callable[[Word], Tuple[Pronunciations, Tuple[str, ...]]]
+part_lookups: Dict[Tuple[Any, ...], PartLookupMethod] = {}
+
+
+def get_part_lookup(style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, supervised: bool, frequency_weighting: Optional[FrequencyWeighting]) -> PartLookupMethod:
+  key = (style, v_to_u, strict, neutral_tone_with_five, weight, supervised, frequency_weighting)
+  result = part_lookups.get(key)
+  if result is None:
+    result = lru_cache(maxsize=MAX_CACHED_PARTS)(partial(
+      lookup_part,
+      style=style,
+      v_to_u=v_to_u,
+      strict=strict,
+      neutral_tone_with_five=neutral_tone_with_five,
+      weight=weight,
+      supervised=supervised,
+      frequency_weighting=frequency_weighting,
+    ))
+    part_lookups[key] = result
+  return result
+
+
+def lookup_part(part: Word, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, supervised: bool, frequency_weighting: Optional[FrequencyWeighting]) -> Tuple[Pronunciations, Tuple[str, ...]]:
+  """ returns the pronunciations of the part and the symbols that were OOV during the lookup """
+  oov_symbols = []
   lookup_method = partial(
-    lookup_in_model,
+    lookup_in_model_supervised if supervised else lookup_in_model,
     style=style,
     v_to_u=v_to_u,
     strict=strict,
     neutral_tone_with_five=neutral_tone_with_five,
     weight=weight,
+    oov_symbols=oov_symbols,
+    frequency_weighting=frequency_weighting,
   )
+  pronunciations = lookup_with_check(part, lookup_method)
+  return pronunciations, tuple(oov_symbols)
+
 
-  pronunciations = get_pronunciations_from_word(word, lookup_method, options)
-  # logger = getLogger(__name__)
-  # logger.debug(pronunciations)
-  return word_i, pronunciations
+def get_word_pronunciations(word: Word, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, supervised: bool = False, oov_symbols: Optional[List[str]] = None, frequency_weighting: Optional[FrequencyWeighting] = None) -> Pronunciations:
+  part_lookup = get_part_lookup(style, v_to_u, strict, neutral_tone_with_five,
+                                weight, supervised, frequency_weighting)
 
+  def lookup(part: Word) -> Pronunciations:
+    part_pronunciations, part_oov_symbols = part_lookup(part)
+    if oov_symbols is not None:
+      # a word is only unresolved because of its last lookup (e.g., after trimming or splitting it)
+      oov_symbols[:] = part_oov_symbols
+    return part_pronunciations
 
-def lookup_in_model(word: Word, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float) -> Pronunciations:
+  if frequency_weighting is None:
+    pronunciations = get_compound_pronunciations(word, lookup, options)
+  else:
+    # the parts are pruned and ordered by the lookup, the combinations of them here
+    pronunciations = get_compound_pronunciations(
+      word, lookup, options, frequency_weighting.top_k, frequency_weighting.cumulative_probability, best_first=True)
+  return pronunciations
+
+
+def get_chunk_pronunciations(vocabulary: List[Word], chunk: Chunk, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, frequency_weighting: Optional[FrequencyWeighting] = None) -> ChunkResult:
+  start, end = chunk
+  assert 0 <= start <= end <= len(vocabulary)
+  result = []
+  oov_statistics = OOVStatistics()
+  for word_i in range(start, end):
+    word = vocabulary[word_i]
+    oov_symbols = []
+    pronunciations = get_word_pronunciations(
+      word, style, v_to_u, strict, neutral_tone_with_five, weight, options, oov_symbols=oov_symbols, frequency_weighting=frequency_weighting)
+    add_oov_symbol(oov_statistics, word_i, word, pronunciations, oov_symbols)
+    result.append(pronunciations)
+  return chunk, result, oov_statistics
+
+
+def get_chunk_pronunciations_supervised(vocabulary: List[Word], chunk: Chunk, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, options: Options, frequency_weighting: Optional[FrequencyWeighting] = None) -> Tuple[Chunk, ChunkPronunciations, OOVStatistics, Dict[int, QuarantineEntry]]:
+  start, end = chunk
+  assert 0 <= start <= end <= len(vocabulary)
+  result = []
+  oov_statistics = OOVStatistics()
+  failures = {}
+  for word_i in range(start, end):
+    word = vocabulary[word_i]
+    oov_symbols = []
+    try:
+      pronunciations = get_word_pronunciations(
+        word, style, v_to_u, strict, neutral_tone_with_five, weight, options, supervised=True, oov_symbols=oov_symbols, frequency_weighting=frequency_weighting)
+    except SupervisedLookupError as error:
+      failures[word_i] = get_failure_reason(error.args[0])
+      pronunciations = OrderedDict()
+    except Exception as error:  # pylint: disable=broad-except
+      failures[word_i] = get_failure_reason(error)
+      pronunciations = OrderedDict()
+    else:
+      add_oov_symbol(oov_statistics, word_i, word, pronunciations, oov_symbols)
+    result.append(pronunciations)
+  return chunk, result, oov_statistics, failures
+
+
+def add_oov_symbol(oov_statistics: OOVStatistics, word_i: int, word: Word, pronunciations: Pronunciations, oov_symbols: List[str]) -> None:
+  if len(pronunciations) == 0 and len(oov_symbols) > 0:
+    # only the first symbol of the last lookup is known because the transcription stops there
+    oov_statistics.add(word_i, word, oov_symbols[0])
+
+
+class SupervisedLookupError(BaseException):
+  # derived from BaseException because word_to_pronunciation swallows all exceptions of the lookup method
+  pass
+
+
+def lookup_in_model_supervised(word: Word, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, oov_symbols: Optional[List[str]] = None, frequency_weighting: Optional[FrequencyWeighting] = None) -> Pronunciations:
+  try:
+    return lookup_in_model(word, style, v_to_u, strict, neutral_tone_with_five, weight, oov_symbols, frequency_weighting)
+  except Exception as error:
+    raise SupervisedLookupError(error) from error
+
+
+def lookup_in_model(word: Word, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, weight: float, oov_symbols: Optional[List[str]] = None, frequency_weighting: Optional[FrequencyWeighting] = None) -> Pronunciations:
   assert len(word) > 0
   try:
-    word_pinyins = word_to_pinyin(word, style, v_to_u, strict, neutral_tone_with_five)
+    if frequency_weighting is None:
+      word_pinyins = OrderedDict(
+        (word_pinyin, 1.0)
+        for word_pinyin in word_to_pinyin(word, style, v_to_u, strict, neutral_tone_with_five)
+      )
+    else:
+      word_pinyins = word_to_weighted_pinyin(
+        word, style, v_to_u, strict, neutral_tone_with_five, frequency_weighting.top_k, frequency_weighting.cumulative_probability)
+  except SyllableTranscriptionError as error:
+    if oov_symbols is not None:
+      oov_symbols.append(error.syllable)
+    return OrderedDict()
   except ValueError as error:
     return OrderedDict()
   except TypeError as error:
     return OrderedDict()
 
   result = OrderedDict(
-    (word_IPA, weight)
-    for word_IPA in word_pinyins
+    (word_IPA, weight * probability)
+    for word_IPA, probability in word_pinyins.items()
   )
   return result
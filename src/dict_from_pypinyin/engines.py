@@ -0,0 +1,37 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from multiprocessing.pool import Pool
+from typing import Callable
+
+from dict_from_pypinyin.types import Chunk, ChunkResult
+
+ChunkMethod = Callable[[Chunk], ChunkResult]
+# submits a chunk and calls the first callback with its result or the second one with the raised exception
+SubmitMethod = Callable[[Chunk, Callable[[ChunkResult], None],
+                         Callable[[BaseException], None]], None]
+
+
+class Engine(Enum):
+  # multiprocessing pool; each worker holds a copy of the vocabulary
+  PROCESSES = "processes"
+  # thread pool; avoids pickling and copies of the vocabulary but requires a free-threaded build for parallelism
+  THREADS = "threads"
+
+
+def get_pool_submit_method(pool: Pool, method: ChunkMethod) -> SubmitMethod:
+  def submit(chunk: Chunk, callback: Callable[[ChunkResult], None], error_callback: Callable[[BaseException], None]) -> None:
+    pool.apply_async(method, (chunk,), callback=callback, error_callback=error_callback)
+  return submit
+
+
+def get_executor_submit_method(executor: ThreadPoolExecutor, method: ChunkMethod) -> SubmitMethod:
+  def submit(chunk: Chunk, callback: Callable[[ChunkResult], None], error_callback: Callable[[BaseException], None]) -> None:
+    def on_done(future: Future) -> None:
+      error = future.exception()
+      if error is None:
+        callback(future.result())
+      else:
+        error_callback(error)
+    executor.submit(method, chunk).add_done_callback(on_done)
+  return submit
+
@@ -0,0 +1,22 @@
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from dict_from_pypinyin.engines import Engine
+
+
+class ExecutionOptions(NamedTuple):
+  engine: Engine = Engine.PROCESSES
+  # largest amount of completed chunks that wait for an earlier one (default: two per job)
+  max_buffered_chunks: Optional[int] = None
+  # completed chunks are saved in this directory and loaded from it if the run is resumed
+  checkpoint_dir: Optional[Path] = None
+  resume: bool = False
+  # failed chunks are retried in smaller parts and the offending words are quarantined; requires the process engine
+  supervised: bool = False
+  # deadline per chunk in seconds; requires supervised execution
+  chunk_timeout: Optional[float] = None
+  # memory budget in bytes
+  max_memory: Optional[int] = None
+  # each chunk is profiled in its worker and the profiles are merged in this directory; requires the process engine
+  profile_dir: Optional[Path] = None
+  profile_collapsed_stacks: bool = False
@@ -0,0 +1,87 @@
+from collections import Counter, defaultdict
+from functools import lru_cache
+from heapq import heappop, heappush
+from typing import Dict, Generator, List, NamedTuple, Optional, Tuple
+
+from pypinyin import Style
+from pypinyin.converter import UltimateConverter
+from pypinyin.phrases_dict import phrases_dict
+from pypinyin.pinyin_dict import pinyin_dict
+
+# added to the count of each reading so that readings which don't occur in any phrase keep a small probability
+SMOOTHING = 1.0
+
+
+class FrequencyWeighting(NamedTuple):
+  # amount of most probable pronunciations that are kept per word
+  top_k: Optional[int] = None
+  # most probable pronunciations are kept until their probabilities sum up to this value
+  cumulative_probability: Optional[float] = None
+
+
+@lru_cache(maxsize=None)
+def get_reading_counts() -> Dict[str, Counter]:
+  """ counts how often each reading (in Style.TONE) of a hanzi occurs in the phrases of pypinyin """
+  result: Dict[str, Counter] = defaultdict(Counter)
+  for phrase, phrase_readings in phrases_dict.items():
+    if len(phrase) != len(phrase_readings):
+      continue
+    for hanzi, readings in zip(phrase, phrase_readings):
+      result[hanzi].update(readings)
+  return result
+
+
+@lru_cache(maxsize=2**16)
+def get_reading_probabilities(syllable: str, heteronyms: Tuple[str, ...], style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool) -> Tuple[float, ...]:
+  """ returns the probability of each heteronym (in the given style) of the syllable """
+  styled_counts: Dict[str, float] = defaultdict(float)
+  if ord(syllable) in pinyin_dict:
+    counts = get_reading_counts().get(syllable, Counter())
+    converter = UltimateConverter(v_to_u=v_to_u, neutral_tone_with_five=neutral_tone_with_five)
+    for reading in pinyin_dict[ord(syllable)].split(","):
+      styled_reading = converter.convert_style(syllable, reading, style, strict)
+      styled_counts[styled_reading] += counts[reading] + SMOOTHING
+  weights = [styled_counts.get(heteronym, SMOOTHING) for heteronym in heteronyms]
+  total = sum(weights)
+  return tuple(w / total for w in weights)
+
+
+def iterate_best_combinations(probabilities: List[List[float]]) -> Generator[Tuple[Tuple[int, ...], float], None, None]:
+  """
+  Yields the index combinations of the Cartesian product of the lists together with their probability (product of the probabilities) in descending order of probability without enumerating the whole product; each list needs to be sorted descending.
+  Combinations with equal probability are yielded in the order of `itertools.product`.
+  """
+  def get_probability(indices: Tuple[int, ...]) -> float:
+    result = 1.0
+    for index, syllable_probabilities in zip(indices, probabilities):
+      result *= syllable_probabilities[index]
+    return result
+
+  start = tuple(0 for _ in probabilities)
+  heap = [(-get_probability(start), start)]
+  queued = {start}
+  while len(heap) > 0:
+    negative_probability, indices = heappop(heap)
+    yield indices, -negative_probability
+    for position, index in enumerate(indices):
+      if index + 1 < len(probabilities[position]):
+        successor = indices[:position] + (index + 1,) + indices[position + 1:]
+        if successor not in queued:
+          queued.add(successor)
+          heappush(heap, (-get_probability(successor), successor))
+
+
+def iterate_pruned_combinations(probabilities: List[List[float]], top_k: Optional[int], cumulative_probability: Optional[float]) -> Generator[Tuple[Tuple[int, ...], float], None, None]:
+  """
+  Yields the same as `iterate_best_combinations` but only the `top_k` most probable combinations or the most probable combinations until their probabilities sum up to `cumulative_probability`.
+  """
+  n_combinations = 0
+  total_probability = 0.0
+  for indices, probability in iterate_best_combinations(probabilities):
+    yield indices, probability
+    n_combinations += 1
+    total_probability += probability
+    if top_k is not None and n_combinations >= top_k:
+      break
+    if cumulative_probability is not None and total_probability >= cumulative_probability:
+      break
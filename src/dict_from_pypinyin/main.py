@@ -1,10 +1,15 @@
-from argparse import ArgumentParser, Namespace
+import json
+import os
+from argparse import ArgumentParser, Namespace, _ArgumentGroup
+from collections import OrderedDict
+from contextlib import contextmanager
 from logging import getLogger
 from pathlib import Path
 from tempfile import gettempdir
+from typing import Generator, Optional, TextIO
 
 from ordered_set import OrderedSet
-from pronunciation_dictionary import SerializationOptions, save_dict
+from pronunciation_dictionary import Pronunciations, SerializationOptions, Word, serialize
 from pypinyin import Style
 
 from dict_from_pypinyin.argparse_helper import (DEFAULT_PUNCTUATION, ConvertToOrderedSetAction,
@@ -12,26 +17,74 @@ from dict_from_pypinyin.argparse_helper import (DEFAULT_PUNCTUATION, ConvertToOr
                                                 add_encoding_argument, add_maxtaskperchild_argument,
                                                 add_n_jobs_argument, add_serialization_group,
                                                 get_optional, parse_existing_file,
+                                                parse_float_0_to_1, parse_memory_size,
                                                 parse_non_empty_or_whitespace, parse_path,
-                                                parse_positive_float)
+                                                parse_positive_float, parse_positive_integer)
+from dict_from_pypinyin.checkpoint import TMP_SUFFIX
 from dict_from_pypinyin.core import convert_chinese_to_pinyin
+from dict_from_pypinyin.engines import Engine
+from dict_from_pypinyin.execution import ExecutionOptions
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.report import ConversionReport
+from dict_from_pypinyin.reverse_index import ReverseIndexBuilder
+from dict_from_pypinyin.types import Writer
+from dict_from_pypinyin.vocabulary import read_vocabulary
 
 
 def get_app_try_add_vocabulary_from_pronunciations_parser(parser: ArgumentParser):
   parser.description = "Command-line interface (CLI) to create a pronunciation dictionary by looking up IPA transcriptions using pypinyin including the possibility of ignoring punctuation and splitting words on hyphens before transcribing them."
   default_oov_out = Path(gettempdir()) / "oov.txt"
+  default_quarantine_out = Path(gettempdir()) / "quarantine.txt"
   # TODO support multiple files
   parser.add_argument("vocabulary", metavar='VOCABULARY-PATH', type=parse_existing_file,
                       help="file containing the vocabulary (words separated by line)")
   add_encoding_argument(parser, "--vocabulary-encoding", "encoding of vocabulary")
   parser.add_argument("dictionary", metavar='DICTIONARY-PATH', type=parse_path,
                       help="path to output the created dictionary")
+  add_conversion_arguments(parser)
+  parser.add_argument("--oov-out", metavar="OOV-PATH", type=get_optional(parse_path),
+                      help="write out-of-vocabulary (OOV) words (i.e., words that can't transcribed) to this file (encoding will be the same as the one from the vocabulary file)", default=default_oov_out)
+  add_oov_report_arguments(parser)
+  add_serialization_group(parser)
+  supervision_group = add_execution_arguments(parser)
+  supervision_group.add_argument("--quarantine-out", metavar="QUARANTINE-PATH", type=get_optional(parse_path),
+                                 help="write quarantined words together with the reason (timeout, memory, exception) to this file", default=default_quarantine_out)
+  profiling_group = parser.add_argument_group("profiling arguments")
+  profiling_group.add_argument("--profile", metavar="DIRECTORY", type=get_optional(parse_path),
+                               help="profile each chunk in its worker process with cProfile and write the merged profile (profile.prof) and a report (profile.txt) with the time per package and the most expensive functions to this directory (not applicable with --engine THREADS)", default=None)
+  profiling_group.add_argument("--profile-collapsed-stacks", action="store_true",
+                               help="additionally sample the stacks in the workers and write them as collapsed stacks (profile.folded) for flame graph tools (requires --profile)")
+  reverse_index_group = parser.add_argument_group("reverse index arguments")
+  reverse_index_group.add_argument("--reverse-index", metavar="PATH", type=get_optional(parse_path),
+                                   help="additionally write an index from the pronunciations to the words of the vocabulary to this file; it is built while the dictionary is written", default=None)
+  reverse_index_group.add_argument("--reverse-index-toneless", action="store_true",
+                                   help="additionally index the pronunciations without tones (requires --reverse-index)")
+  checkpoint_group = parser.add_argument_group("checkpoint arguments")
+  checkpoint_group.add_argument("--checkpoint-dir", metavar="DIRECTORY", type=get_optional(parse_path),
+                                help="save completed chunks to this directory so that an interrupted run can be resumed", default=None)
+  checkpoint_group.add_argument("--resume", action="store_true",
+                                help="skip chunks that were already completed in the checkpoint directory (requires --checkpoint-dir)")
+  return get_pronunciations_files
+
+
+def add_oov_report_arguments(parser: ArgumentParser) -> None:
+  parser.add_argument("--oov-report", metavar="OOV-REPORT-PATH", type=get_optional(parse_path),
+                      help="write a report (JSON) of the symbols that caused words to be OOV including their counts and example words to this file", default=None)
+  parser.add_argument("--oov-report-top", metavar="NUMBER", type=get_optional(parse_positive_integer),
+                      help="include only this amount of the most frequent symbols in the OOV report", default=None)
+
+
+def add_conversion_arguments(parser: ArgumentParser) -> None:
   parser.add_argument("--weight", type=parse_positive_float, metavar="WEIGHT",
                       help="weight to assign for each pronunciation", default=1.0)
   parser.add_argument("--trim", type=parse_non_empty_or_whitespace, metavar='TRIM-SYMBOL', nargs='*',
                       help="trim these symbols from the start and end of a word before lookup", action=ConvertToOrderedSetAction, default=DEFAULT_PUNCTUATION)
   parser.add_argument("--split-on-hyphen", action="store_true",
                       help="split words on hyphen symbol before lookup")
+  parser.add_argument("--try-without-trimming", action="store_true",
+                      help="look up words with their trim symbols first and trim them only if that fails")
+  parser.add_argument("--try-without-splitting", action="store_true",
+                      help="look up words containing hyphens as a whole first and split them only if that fails (only relevant with --split-on-hyphen)")
   parser.add_argument("--style", type=Style, default=Style.TONE,
                       action=EnumAction, help="pinyin style")
   parser.add_argument("--ü-to-v", action="store_true",
@@ -40,14 +93,88 @@ def get_app_try_add_vocabulary_from_pronunciations_parser(parser: ArgumentParser
                       help="don't use strict transcription")
   parser.add_argument("--neutral-tone-with-five", action="store_true",
                       help="transcribe neutral tone with 5 in Styles TONE2/TONE3")
-  parser.add_argument("--oov-out", metavar="OOV-PATH", type=get_optional(parse_path),
-                      help="write out-of-vocabulary (OOV) words (i.e., words that can't transcribed) to this file (encoding will be the same as the one from the vocabulary file)", default=default_oov_out)
-  add_serialization_group(parser)
+  weighting_group = parser.add_argument_group("weighting arguments")
+  weighting_group.add_argument("--weight-by-frequency", action="store_true",
+                               help="multiply the weight of each pronunciation by its probability, which is estimated from the frequencies of the readings of each hanzi in the phrases of pypinyin; pronunciations are ordered by descending probability")
+  weighting_group.add_argument("--top-k", metavar="NUMBER", type=get_optional(parse_positive_integer),
+                               help="keep only this amount of the most probable pronunciations per word (requires --weight-by-frequency)", default=None)
+  weighting_group.add_argument("--cumulative-probability", metavar="PROBABILITY", type=get_optional(parse_float_0_to_1),
+                               help="keep only the most probable pronunciations per word until their probabilities sum up to this value (requires --weight-by-frequency)", default=None)
+
+
+def add_execution_arguments(parser: ArgumentParser) -> _ArgumentGroup:
   mp_group = parser.add_argument_group("multiprocessing arguments")
   add_n_jobs_argument(mp_group)
   add_chunksize_argument(mp_group)
   add_maxtaskperchild_argument(mp_group)
-  return get_pronunciations_files
+  mp_group.add_argument("--engine", type=Engine, default=Engine.PROCESSES, action=EnumAction,
+                        help="execute the jobs in processes or in threads (only faster on free-threaded Python builds, i.e., GIL-bound on all supported Python versions; not applicable in supervised mode)")
+  mp_group.add_argument("--max-buffered-chunks", metavar="NUMBER", type=get_optional(parse_positive_integer),
+                        help="maximum amount of chunks that are in flight or wait for an earlier chunk before they can be written in vocabulary order; defaults to two per job (not applicable with --max-memory or in supervised mode)", default=None)
+  mp_group.add_argument("--max-memory", metavar="SIZE", type=get_optional(parse_memory_size),
+                        help="memory budget (bytes or with unit K, M, G, T, e.g., 8G); limits the jobs to those that fit into the budget together with their results, reduces the chunk size to the estimated result size of a sample, adjusts the sizes of the parts in flight to the observed result sizes and spills completed results to disk if the budget is near (in supervised mode only the jobs and the chunk size are limited and results are spilled; measuring the memory usage requires /proc, e.g., Linux)", default=None)
+  supervision_group = parser.add_argument_group("supervision arguments")
+  supervision_group.add_argument("--supervised", action="store_true",
+                                 help="isolate failing words: chunks whose worker raises an exception, dies or exceeds the timeout are retried in smaller parts and the offending words are quarantined")
+  supervision_group.add_argument("--chunk-timeout", metavar="SECONDS", type=get_optional(parse_positive_float),
+                                 help="maximum time a chunk may take in supervised mode", default=None)
+  return supervision_group
+
+
+def get_dictionary_writer(dictionary_file: TextIO, s_options: SerializationOptions) -> Writer:
+  """ returns a writer that serializes the words to the file with the same layout as `save_dict`, i.e., without trailing line break """
+  lines_count = 0
+
+  def write_pronunciations(word: Word, pronunciations: Pronunciations) -> None:
+    nonlocal lines_count
+    for line in serialize(OrderedDict(((word, pronunciations),)), s_options):
+      dictionary_file.write(line if lines_count == 0 else f"\n{line}")
+      lines_count += 1
+  return write_pronunciations
+
+
+@contextmanager
+def open_atomic(path: Path, encoding: str) -> Generator[TextIO, None, None]:
+  """ opens a temporary file for writing that replaces the file at the path only if the block completes without an exception """
+  tmp_path = path.parent / f"{path.name}{TMP_SUFFIX}"
+  try:
+    with open(tmp_path, mode="w", encoding=encoding) as file:
+      yield file
+      file.flush()
+      os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+  finally:
+    if tmp_path.is_file():
+      tmp_path.unlink()
+
+
+def write_oov_files(unresolved_words: OrderedSet[Word], oov_statistics: OOVStatistics, oov_out: Optional[Path], oov_report: Optional[Path], oov_report_top: Optional[int]) -> bool:
+  """ writes the unresolved words and the report of the symbols that caused them to the given files (if any) """
+  logger = getLogger(__name__)
+  if len(unresolved_words) == 0:
+    logger.info("Complete vocabulary is contained in output!")
+    return True
+
+  logger.warning("Not all words could be transcribed to pinyin!")
+  if oov_out is not None:
+    unresolved_out_content = "\n".join(unresolved_words)
+    oov_out.parent.mkdir(parents=True, exist_ok=True)
+    try:
+      oov_out.write_text(unresolved_out_content, "UTF-8")
+    except Exception as ex:
+      logger.error("Unresolved output file couldn't be created!")
+      return False
+    logger.info(f"Written unresolved vocabulary to: \"{oov_out.absolute()}\".")
+  if oov_report is not None:
+    oov_report_content = oov_statistics.get_report(len(unresolved_words), oov_report_top)
+    oov_report.parent.mkdir(parents=True, exist_ok=True)
+    try:
+      oov_report.write_text(json.dumps(oov_report_content, ensure_ascii=False, indent=2), "UTF-8")
+    except Exception as ex:
+      logger.error("OOV report couldn't be created!")
+      return False
+    logger.info(f"Written OOV report to: \"{oov_report.absolute()}\".")
+  return True
 
 
 def get_pronunciations_files(ns: Namespace) -> bool:
@@ -55,42 +182,113 @@ def get_pronunciations_files(ns: Namespace) -> bool:
   logger = getLogger(__name__)
 
   try:
-    vocabulary_content = ns.vocabulary.read_text(ns.vocabulary_encoding)
+    vocabulary_words = read_vocabulary(ns.vocabulary, ns.vocabulary_encoding, ns.n_jobs)
   except Exception as ex:
     logger.error("Vocabulary couldn't be read.")
     return False
 
-  vocabulary_words = OrderedSet(vocabulary_content.splitlines())
   strict = not ns.non_strict
   v_to_u = not ns.ü_to_v
 
-  dictionary_instance, unresolved_words = convert_chinese_to_pinyin(
-    vocabulary_words, ns.style, v_to_u, strict, ns.neutral_tone_with_five, ns.weight, set(ns.trim), ns.split_on_hyphen, ns.n_jobs, ns.maxtasksperchild, ns.chunksize, silent=False)
+  if ns.resume and ns.checkpoint_dir is None:
+    logger.error("Resuming requires a checkpoint directory!")
+    return False
+
+  if ns.supervised and ns.engine != Engine.PROCESSES:
+    logger.error("Supervised execution requires the process engine!")
+    return False
+
+  if ns.chunk_timeout is not None and not ns.supervised:
+    logger.error("Chunk timeouts require supervised execution (--supervised)!")
+    return False
+
+  if ns.profile is not None and ns.engine != Engine.PROCESSES:
+    logger.error("Profiling requires the process engine!")
+    return False
+
+  if ns.profile_collapsed_stacks and ns.profile is None:
+    logger.error("Collapsed stacks require a profile directory (--profile)!")
+    return False
+
+  if (ns.top_k is not None or ns.cumulative_probability is not None) and not ns.weight_by_frequency:
+    logger.error("Pruning requires weighting by frequency (--weight-by-frequency)!")
+    return False
+
+  if ns.reverse_index_toneless and ns.reverse_index is None:
+    logger.error("Toneless keys require a reverse index (--reverse-index)!")
+    return False
 
+  execution = ExecutionOptions(
+    engine=ns.engine,
+    max_buffered_chunks=ns.max_buffered_chunks,
+    checkpoint_dir=ns.checkpoint_dir,
+    resume=ns.resume,
+    supervised=ns.supervised,
+    chunk_timeout=ns.chunk_timeout,
+    max_memory=ns.max_memory,
+    profile_dir=ns.profile,
+    profile_collapsed_stacks=ns.profile_collapsed_stacks,
+  )
+  report = ConversionReport()
+  reverse_index = ReverseIndexBuilder() if ns.reverse_index is not None else None
   s_options = SerializationOptions(ns.parts_sep, ns.include_numbers, ns.include_weights)
 
+  # the dictionary is written in vocabulary order while the conversion is running; an existing dictionary is only replaced if the conversion succeeds
   try:
-    save_dict(dictionary_instance, ns.dictionary, ns.serialization_encoding, s_options)
-  except Exception as ex:
+    ns.dictionary.parent.mkdir(parents=True, exist_ok=True)
+    with open_atomic(ns.dictionary, ns.serialization_encoding) as dictionary_file:
+      _, unresolved_words = convert_chinese_to_pinyin(
+        vocabulary_words, ns.style, v_to_u, strict, ns.neutral_tone_with_five, ns.weight, set(ns.trim), ns.split_on_hyphen, ns.n_jobs, ns.maxtasksperchild, ns.chunksize, silent=False, report=report, weight_by_frequency=ns.weight_by_frequency, top_k=ns.top_k, cumulative_probability=ns.cumulative_probability, writer=get_dictionary_writer(dictionary_file, s_options), try_without_trimming=ns.try_without_trimming, try_without_splitting=ns.try_without_splitting, reverse_index=reverse_index, execution=execution)
+  except ValueError as ex:
+    logger.error(ex)
+    return False
+  except OSError as ex:
     logger.error("Dictionary couldn't be written.")
     logger.debug(ex)
     return False
 
   logger.info(f"Written dictionary to: \"{ns.dictionary.absolute()}\".")
 
-  if len(unresolved_words) > 0:
-    logger.warning("Not all words could be transcribed to pinyin!")
-    if ns.oov_out is not None:
-      unresolved_out_content = "\n".join(unresolved_words)
-      ns.oov_out.parent.mkdir(parents=True, exist_ok=True)
-      try:
-        ns.oov_out.write_text(unresolved_out_content, "UTF-8")
-      except Exception as ex:
-        logger.error("Unresolved output file couldn't be created!")
-        return False
-      logger.info(f"Written unresolved vocabulary to: \"{ns.oov_out.absolute()}\".")
-  else:
-    logger.info("Complete vocabulary is contained in output!")
+  if reverse_index is not None:
+    try:
+      reverse_index.build(ns.reverse_index_toneless).save(ns.reverse_index)
+    except ValueError as ex:
+      logger.error(ex)
+      return False
+    except OSError as ex:
+      logger.error("Reverse index couldn't be written.")
+      logger.debug(ex)
+      return False
+    logger.info(f"Written reverse index to: \"{ns.reverse_index.absolute()}\".")
+
+  if not write_oov_files(unresolved_words, report.oov_statistics, ns.oov_out, ns.oov_report, ns.oov_report_top):
+    return False
+
+  if len(report.quarantined_words) > 0 and ns.quarantine_out is not None:
+    quarantine_out_content = "\n".join(
+      f"{word}\t{reason}\t{details}"
+      for word, (reason, details) in report.quarantined_words.items()
+    )
+    ns.quarantine_out.parent.mkdir(parents=True, exist_ok=True)
+    try:
+      ns.quarantine_out.write_text(quarantine_out_content, "UTF-8")
+    except Exception as ex:
+      logger.error("Quarantine output file couldn't be created!")
+      return False
+    logger.info(f"Written quarantined words to: \"{ns.quarantine_out.absolute()}\".")
+
+  if report.peak_rss is not None:
+    if report.peak_worker_rss is None:
+      logger.info(f"Peak memory usage (RSS): {report.peak_rss / 1024**2:.1f} MiB")
+    else:
+      logger.info(f"Peak memory usage (RSS): {report.peak_rss / 1024**2:.1f} MiB (largest worker: {report.peak_worker_rss / 1024**2:.1f} MiB)")
+
+  if ns.profile is not None:
+    logger.info(f"Written profile to: \"{ns.profile.absolute()}\".")
+
+  if report.duration is not None and report.duration > 0:
+    logger.info(
+      f"Waited {report.head_of_line_wait:.2f}s ({report.head_of_line_wait / report.duration * 100:.1f}% of {report.duration:.2f}s) for chunks to complete in vocabulary order (at most {report.max_buffered_chunks} chunk(s) buffered).")
 
   return True
 
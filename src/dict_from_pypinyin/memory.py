@@ -0,0 +1,154 @@
+import os
+import sys
+from collections import deque
+from logging import getLogger
+from queue import SimpleQueue
+from typing import Deque, Generator, List, Optional
+
+from dict_from_pypinyin.chunking import ChunkAssembler
+from dict_from_pypinyin.engines import SubmitMethod
+from dict_from_pypinyin.types import Chunk, ChunkPronunciations, ChunkResult
+
+try:
+  import resource
+except ImportError:
+  resource = None
+
+# share of the memory budget that the workers together with the results of all chunks in flight may take
+IN_FLIGHT_SHARE = 0.5
+# share of the memory budget that the results of a single chunk may take in the main process
+CHUNK_SHARE = 0.1
+# memory that is at least reserved for the results in flight of each worker in bytes
+MIN_PART_BUDGET = 8 * 1024**2
+# share of the remaining memory budget of the main process from which on completed results are spilled to disk
+SPILL_SHARE = 0.8
+# amount of words per part until the result size per word could be estimated
+INITIAL_PARTS_SIZE = 100
+SIZE_SAMPLES = 100
+
+
+def get_current_rss() -> Optional[int]:
+  """
+  Returns the current resident set size of this process in bytes or None if it is unknown.
+  It is only available if /proc exists (e.g., on Linux); the peak resident set size is no substitute because it never decreases, i.e., all later results would be spilled once it exceeded the threshold.
+  """
+  try:
+    with open("/proc/self/statm", mode="r", encoding="UTF-8") as file:
+      resident_pages = int(file.read().split()[1])
+  except (OSError, ValueError, IndexError):
+    return None
+  return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def get_peak_rss(children: bool = False) -> Optional[int]:
+  """ returns the peak resident set size of this process (or its largest terminated child) in bytes """
+  if resource is None:
+    return None
+  usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+  # macOS reports bytes, other platforms kilobytes
+  if sys.platform == "darwin":
+    return usage.ru_maxrss
+  return usage.ru_maxrss * 1024
+
+
+def is_memory_budget_near(max_memory: int) -> bool:
+  """ returns False if the current resident set size is unknown, i.e., results are never spilled then """
+  rss = get_current_rss()
+  if rss is None:
+    return False
+  return rss >= SPILL_SHARE * (1 - IN_FLIGHT_SHARE) * max_memory
+
+
+def estimate_size(chunk_pronunciations: ChunkPronunciations) -> int:
+  """ estimates the memory that the pronunciations take in bytes from a sample of the words """
+  if len(chunk_pronunciations) == 0:
+    return 0
+  step = max(1, len(chunk_pronunciations) // SIZE_SAMPLES)
+  samples = chunk_pronunciations[::step]
+  sample_size = 0
+  for pronunciations in samples:
+    sample_size += sys.getsizeof(pronunciations)
+    for pronunciation in pronunciations.keys():
+      sample_size += sys.getsizeof(pronunciation)
+      sample_size += sum(sys.getsizeof(symbol) for symbol in pronunciation)
+  return round(sample_size / len(samples) * len(chunk_pronunciations))
+
+
+def get_max_workers(max_memory: int, n_jobs: int, worker_rss: Optional[int]) -> int:
+  """
+  Returns how many of the `n_jobs` workers fit together with the results of their parts in flight into a share of `max_memory`, but at least one.
+  `worker_rss` is the measured resident set size of a worker (zero for threads); if it is unknown, all jobs are used.
+  """
+  if worker_rss is None:
+    return n_jobs
+  result = int(IN_FLIGHT_SHARE * max_memory // (worker_rss + MIN_PART_BUDGET))
+  if result < 1:
+    logger = getLogger(__name__)
+    logger.warning(
+      f"A single worker ({worker_rss / 1024**2:.1f} MiB) doesn't fit into the memory budget, therefore it will be exceeded!")
+  return max(1, min(n_jobs, result))
+
+
+def get_part_budget(max_memory: int, max_in_flight: int, worker_rss: int) -> float:
+  """ returns the memory in bytes that the results of each part in flight may take, but at least `MIN_PART_BUDGET` so that the parts don't shrink to single words if the workers alone exceed the budget """
+  result = (max_memory * IN_FLIGHT_SHARE - max_in_flight * worker_rss) / max_in_flight
+  return max(MIN_PART_BUDGET, result)
+
+
+def get_chunksize_within_budget(max_memory: int, chunksize: int, sample_pronunciations: ChunkPronunciations) -> int:
+  """ returns the chunk size (at most `chunksize`) whose results fit into a share of `max_memory` estimated from the results of a sample of the words """
+  if len(sample_pronunciations) == 0:
+    return chunksize
+  bytes_per_word = estimate_size(sample_pronunciations) / len(sample_pronunciations)
+  if bytes_per_word == 0:
+    return chunksize
+  result = int(CHUNK_SHARE * max_memory // bytes_per_word)
+  return max(1, min(chunksize, result))
+
+
+def get_pronunciations_within_budget(submit: SubmitMethod, chunks: List[Chunk], max_in_flight: int, max_memory: int, worker_rss: int = 0) -> Generator[ChunkResult, None, None]:
+  """
+  Processes the chunks in parts whose size is adjusted so that `max_in_flight` workers of size `worker_rss` together with the results of their parts fit into a share of `max_memory`; yields the chunks in order of completion.
+  """
+  assert max_in_flight > 0
+  part_budget = get_part_budget(max_memory, max_in_flight, worker_rss)
+  assembler = ChunkAssembler(chunks)
+  todo: Deque[Chunk] = deque(chunks)
+  completed: SimpleQueue = SimpleQueue()
+  current_chunk: Optional[Chunk] = None
+  next_start = 0
+  parts_size = INITIAL_PARTS_SIZE
+  n_in_flight = 0
+
+  def on_error(error: BaseException) -> None:
+    completed.put(error)
+
+  while len(todo) > 0 or current_chunk is not None or n_in_flight > 0:
+    while n_in_flight < max_in_flight and (len(todo) > 0 or current_chunk is not None):
+      if current_chunk is None:
+        current_chunk = todo.popleft()
+        next_start = current_chunk[0]
+      part = (next_start, min(next_start + parts_size, current_chunk[1]))
+      parent_chunk = current_chunk
+      next_start = part[1]
+      if next_start == current_chunk[1]:
+        current_chunk = None
+      submit(
+        part,
+        lambda result, parent_chunk=parent_chunk: completed.put((parent_chunk, result)),
+        on_error,
+      )
+      n_in_flight += 1
+
+    entry = completed.get()
+    if isinstance(entry, BaseException):
+      raise entry
+    n_in_flight -= 1
+    parent_chunk, (part, part_pronunciations, part_oov_statistics) = entry
+    start, end = part
+    bytes_per_word = estimate_size(part_pronunciations) / (end - start)
+    if bytes_per_word > 0:
+      parts_size = max(1, int(part_budget // bytes_per_word))
+    finished = assembler.add(parent_chunk, part, part_pronunciations, part_oov_statistics)
+    if finished is not None:
+      yield finished
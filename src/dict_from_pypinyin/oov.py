@@ -0,0 +1,57 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pronunciation_dictionary import Word
+
+# amount of example words that are kept per symbol
+MAX_EXAMPLES = 5
+
+
+class OOVStatistics():
+  """ Counts the symbols that caused words to be out-of-vocabulary (OOV); can be merged across chunks and workers. """
+
+  def __init__(self) -> None:
+    self.symbol_counts: Counter = Counter()
+    # first words (by index in the vocabulary) that failed due to the symbol
+    self.symbol_examples: Dict[str, List[Tuple[int, Word]]] = {}
+
+  def add(self, word_i: int, word: Word, symbol: str) -> None:
+    self.symbol_counts[symbol] += 1
+    examples = self.symbol_examples.setdefault(symbol, [])
+    if len(examples) < MAX_EXAMPLES:
+      examples.append((word_i, word))
+
+  def update(self, other: "OOVStatistics") -> None:
+    self.symbol_counts.update(other.symbol_counts)
+    for symbol, other_examples in other.symbol_examples.items():
+      examples = self.symbol_examples.get(symbol, []) + other_examples
+      # keep the examples independent of the order in which the statistics were merged
+      self.symbol_examples[symbol] = sorted(examples)[:MAX_EXAMPLES]
+
+  def remap_indices(self, indices: Sequence[int]) -> None:
+    """ replaces the indices of the examples, e.g., if they referred to a part of the vocabulary """
+    for examples in self.symbol_examples.values():
+      examples[:] = [(indices[word_i], word) for word_i, word in examples]
+
+  def __len__(self) -> int:
+    return len(self.symbol_counts)
+
+  def get_report(self, n_oov_words: int, top: Optional[int] = None) -> Dict[str, Any]:
+    symbols = sorted(self.symbol_counts.items(), key=lambda item: (-item[1], item[0]))
+    if top is not None:
+      symbols = symbols[:top]
+    result = {
+      "oov_words": n_oov_words,
+      "attributed_oov_words": sum(self.symbol_counts.values()),
+      "distinct_symbols": len(self.symbol_counts),
+      "symbols": [
+        {
+          "symbol": symbol,
+          "codepoint": f"U+{ord(symbol):04X}" if len(symbol) == 1 else None,
+          "count": count,
+          "examples": [word for _, word in self.symbol_examples[symbol]],
+        }
+        for symbol, count in symbols
+      ],
+    }
+    return result
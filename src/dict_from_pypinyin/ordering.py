@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from pathlib import Path
+from queue import SimpleQueue
+from time import perf_counter
+from typing import Callable, Dict, Generator, Iterator, List, Optional, Set, Tuple
+
+from dict_from_pypinyin.checkpoint import load_chunk, save_chunk
+from dict_from_pypinyin.engines import SubmitMethod
+from dict_from_pypinyin.memory import is_memory_budget_near
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.supervision import QuarantineEntry
+from dict_from_pypinyin.types import Chunk, ChunkPronunciations, ChunkResult
+
+
+@dataclass()
+class ReorderStatistics():
+  # time (in seconds) spent waiting for the next chunk in order while later chunks were already completed
+  head_of_line_wait: float = 0.0
+  # largest amount of completed chunks that waited for an earlier one
+  max_buffered_chunks: int = 0
+
+  def add_wait(self, duration: float, n_buffered: int) -> None:
+    if n_buffered > 0:
+      self.head_of_line_wait += duration
+    self.max_buffered_chunks = max(self.max_buffered_chunks, n_buffered)
+
+
+def get_ordered_results(submit: SubmitMethod, chunks: List[Chunk], max_buffered: int, statistics: ReorderStatistics, on_completed: Optional[Callable[[ChunkResult], None]] = None) -> Generator[ChunkResult, None, None]:
+  """
+  Processes the chunks and yields their results in the order of `chunks` no matter in which order they complete; at most `max_buffered` chunks are in flight or wait for an earlier chunk at a time.
+  `on_completed` is called with each result as soon as it is received, i.e., before it waits for an earlier chunk.
+  """
+  assert max_buffered > 0
+  completed: SimpleQueue = SimpleQueue()
+  buffer: Dict[Chunk, ChunkResult] = {}
+  next_submit = 0
+  next_yield = 0
+
+  def on_error(error: BaseException) -> None:
+    completed.put(error)
+
+  def receive(entry) -> None:
+    if isinstance(entry, BaseException):
+      raise entry
+    if on_completed is not None:
+      on_completed(entry)
+    buffer[entry[0]] = entry
+
+  while next_yield < len(chunks):
+    while next_submit < len(chunks) and next_submit - next_yield < max_buffered:
+      submit(chunks[next_submit], completed.put, on_error)
+      next_submit += 1
+
+    # results that completed while the previous one was consumed are received right away
+    while not completed.empty():
+      receive(completed.get())
+
+    head = chunks[next_yield]
+    while head not in buffer:
+      started = perf_counter()
+      entry = completed.get()
+      statistics.add_wait(perf_counter() - started, len(buffer))
+      receive(entry)
+
+    yield buffer.pop(head)
+    next_yield += 1
+
+
+class ChunkMerger():
+  """
+  Merges the results of the chunks, which are received in any order, into the order of `chunks`.
+  Received results are saved in `checkpoint_dir` (if given) together with the words of their chunk in `quarantine`; `completed_chunks` were saved in a previous run and are loaded from it instead.
+  If the memory budget `max_memory` is near, the results that wait for an earlier chunk are spilled to `spill_dir` (or `checkpoint_dir` if given).
+  """
+
+  def __init__(self, chunks: List[Chunk], statistics: ReorderStatistics, quarantine: Dict[int, QuarantineEntry], completed_chunks: Set[Chunk], checkpoint_dir: Optional[Path] = None, max_memory: Optional[int] = None, spill_dir: Optional[Path] = None) -> None:
+    assert max_memory is None or checkpoint_dir is not None or spill_dir is not None
+    self.chunks = chunks
+    self.statistics = statistics
+    self.quarantine = quarantine
+    self.completed_chunks = completed_chunks
+    self.checkpoint_dir = checkpoint_dir
+    self.max_memory = max_memory
+    self.spill_dir = spill_dir if checkpoint_dir is None else checkpoint_dir
+    self.__waiting: Dict[Chunk, Tuple[ChunkPronunciations, OOVStatistics]] = {}
+    self.__spilled: Set[Chunk] = set()
+
+  def get_failures(self, chunk: Chunk) -> Dict[int, QuarantineEntry]:
+    start, end = chunk
+    return {word_i: reason for word_i, reason in self.quarantine.items() if start <= word_i < end}
+
+  def save(self, chunk_result: ChunkResult) -> None:
+    """ saves the result in the checkpoint directory (if given) """
+    if self.checkpoint_dir is not None:
+      save_chunk(self.checkpoint_dir, *chunk_result, self.get_failures(chunk_result[0]))
+
+  def merge(self, results: Iterator[ChunkResult], save_received: bool = True, on_received: Optional[Callable[[Chunk], None]] = None) -> Generator[ChunkResult, None, None]:
+    """
+    Consumes `results` until the next chunk in order is available and yields it; `save_received` is False if the results were already saved on completion.
+    `on_received` is called with each chunk as soon as its result is received.
+    """
+    for chunk in self.chunks:
+      while chunk not in self.completed_chunks and chunk not in self.__waiting and chunk not in self.__spilled:
+        received_chunk = self.__receive(results, chunk, save_received)
+        if on_received is not None:
+          on_received(received_chunk)
+      yield self.__pop(chunk)
+
+  def __receive(self, results: Iterator[ChunkResult], awaited_chunk: Chunk, save_received: bool) -> Chunk:
+    wait_started = perf_counter()
+    chunk_result = next(results, None)
+    if chunk_result is None:
+      raise RuntimeError(f"Chunk {awaited_chunk} was not completed!")
+    self.statistics.add_wait(perf_counter() - wait_started,
+                             len(self.__waiting) + len(self.__spilled))
+    if save_received:
+      self.save(chunk_result)
+    chunk, chunk_pronunciations, chunk_oov_statistics = chunk_result
+    del chunk_result
+    self.__waiting[chunk] = chunk_pronunciations, chunk_oov_statistics
+    del chunk_pronunciations
+    if self.max_memory is not None and is_memory_budget_near(self.max_memory):
+      # the awaited chunk is consumed next, therefore only the chunks that wait for it are spilled
+      for spilled_chunk in [waiting_chunk for waiting_chunk in self.__waiting if waiting_chunk != awaited_chunk]:
+        spilled_result = self.__waiting.pop(spilled_chunk)
+        if self.checkpoint_dir is None:
+          save_chunk(self.spill_dir, spilled_chunk, *spilled_result,
+                     self.get_failures(spilled_chunk))
+        del spilled_result
+        self.__spilled.add(spilled_chunk)
+    return chunk
+
+  def __pop(self, chunk: Chunk) -> ChunkResult:
+    if chunk in self.__waiting:
+      chunk_pronunciations, chunk_oov_statistics = self.__waiting.pop(chunk)
+    else:
+      # resumed or spilled
+      chunk_pronunciations, chunk_oov_statistics, chunk_failures = load_chunk(self.spill_dir, chunk)
+      # the words of resumed chunks were quarantined in a previous run
+      self.quarantine.update(chunk_failures)
+      self.__spilled.discard(chunk)
+    return chunk, chunk_pronunciations, chunk_oov_statistics
@@ -0,0 +1,64 @@
+import re
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from pronunciation_dictionary import Pronunciations, Word
+from word_to_pronunciation import Options, get_pronunciations_from_word
+
+from dict_from_pypinyin.oov import OOVStatistics
+
+# codepoint ranges (incl.) containing all symbols pypinyin can transcribe
+HANZI_RANGES = (
+  (0x3007, 0x3007),  # ideographic number zero
+  (0x3400, 0x4DBF),  # CJK Unified Ideographs Extension A
+  (0x4E00, 0x9FFF),  # CJK Unified Ideographs
+  (0xE815, 0xE864),  # private use area code points of GB 18030
+  (0xF900, 0xFAFF),  # CJK Compatibility Ideographs
+  (0x20000, 0x2A6DF),  # CJK Unified Ideographs Extension B
+  (0x2A700, 0x2EBEF),  # CJK Unified Ideographs Extension C to F and I
+  (0x2F800, 0x2FA1F),  # CJK Compatibility Ideographs Supplement
+  (0x30000, 0x323AF),  # CJK Unified Ideographs Extension G and H
+)
+
+HANZI_PATTERN = re.compile("[" + "".join(
+  f"{re.escape(chr(start))}-{re.escape(chr(end))}"
+  for start, end in HANZI_RANGES
+) + "]")
+
+
+def contains_hanzi(word: Word) -> bool:
+  return HANZI_PATTERN.search(word) is not None
+
+
+def get_pronunciations_without_lookup(word: Word, options: Options, oov_symbols: List[str]) -> Pronunciations:
+  """
+  Returns the pronunciations of a word that contains no hanzi, i.e., the pronunciations that result from trimming and splitting alone; every lookup would fail on its first symbol, so `oov_symbols` is set to the one of the last lookup like in `core.get_word_pronunciations`.
+  """
+  def lookup(part: Word) -> Pronunciations:
+    oov_symbols[:] = part[0]
+    return OrderedDict()
+
+  return get_pronunciations_from_word(word, lookup, options)
+
+
+def prefilter_vocabulary(vocabulary: List[Word], options: Options) -> Tuple[List[Word], "array[int]", Dict[int, Pronunciations], OOVStatistics]:
+  """
+  Separates the words that contain hanzi (returned together with their indices in the vocabulary) from the ones that don't; the latter are resolved directly and only their non-empty pronunciations are returned.
+  """
+  dispatched_words = []
+  dispatched_indices = array("Q")
+  prefiltered_pronunciations = {}
+  oov_statistics = OOVStatistics()
+  for word_i, word in enumerate(vocabulary):
+    if contains_hanzi(word):
+      dispatched_words.append(word)
+      dispatched_indices.append(word_i)
+      continue
+    oov_symbols = []
+    pronunciations = get_pronunciations_without_lookup(word, options, oov_symbols)
+    if len(pronunciations) > 0:
+      prefiltered_pronunciations[word_i] = pronunciations
+    elif len(oov_symbols) > 0:
+      oov_statistics.add(word_i, word, oov_symbols[0])
+  return dispatched_words, dispatched_indices, prefiltered_pronunciations, oov_statistics
@@ -0,0 +1,196 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import sysconfig
+from collections import Counter, defaultdict
+from pathlib import Path
+from threading import Event, Thread, get_ident
+from types import FrameType
+from typing import Any, Callable, Dict, Optional
+
+from dict_from_pypinyin.types import Chunk
+
+CHUNKS_DIR_NAME = "chunks"
+PROFILE_FILE_NAME = "profile.prof"
+REPORT_FILE_NAME = "profile.txt"
+COLLAPSED_STACKS_FILE_NAME = "profile.folded"
+# seconds between two samples of the stack (effectively limited by the switch interval of the interpreter)
+SAMPLING_INTERVAL = 0.001
+# amount of functions listed in the report
+REPORT_TOP = 50
+
+
+class StackSampler(Thread):
+  """ Counts the stacks of another thread of the same process in regular intervals. """
+
+  def __init__(self, thread_id: int, interval: float, root_code: Any) -> None:
+    super().__init__(daemon=True)
+    self.thread_id = thread_id
+    self.interval = interval
+    # only stacks below a frame of this code are counted (without the frame)
+    self.root_code = root_code
+    self.stacks: Counter = Counter()
+    self.stopped = Event()
+
+  def run(self) -> None:
+    while not self.stopped.wait(self.interval):
+      frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+      if frame is not None:
+        stack = get_collapsed_stack(frame, self.root_code)
+        if stack is not None:
+          self.stacks[stack] += 1
+
+  def stop(self) -> None:
+    self.stopped.set()
+    self.join()
+
+
+def get_frame_name(frame: FrameType) -> str:
+  module = frame.f_globals.get("__name__", "?")
+  return f"{module}:{frame.f_code.co_name}"
+
+
+def get_collapsed_stack(frame: Optional[FrameType], root_code: Any) -> Optional[str]:
+  """ returns None if the frame is not below a frame of the root code, e.g., because the sampler is being started or stopped """
+  names = []
+  while frame is not None and frame.f_code is not root_code:
+    names.append(get_frame_name(frame))
+    frame = frame.f_back
+  if frame is None or len(names) == 0:
+    return None
+  return ";".join(reversed(names))
+
+
+def get_chunks_dir(profile_dir: Path) -> Path:
+  return profile_dir / CHUNKS_DIR_NAME
+
+
+def prepare_profile_dir(profile_dir: Path) -> None:
+  chunks_dir = get_chunks_dir(profile_dir)
+  chunks_dir.mkdir(parents=True, exist_ok=True)
+  for path in chunks_dir.iterdir():
+    if path.suffix in (".prof", ".folded"):
+      path.unlink()
+
+
+def profile_chunk(method: Callable[[Chunk], Any], profile_dir: Path, collapsed_stacks: bool, chunk: Chunk) -> Any:
+  """ calls the method with cProfile and optionally a stack sampler enabled and saves their results for the chunk """
+  profiler = cProfile.Profile()
+  sampler = None
+  if collapsed_stacks:
+    sampler = StackSampler(get_ident(), SAMPLING_INTERVAL, cProfile.Profile.runcall.__code__)
+    sampler.start()
+  try:
+    return profiler.runcall(method, chunk)
+  finally:
+    if sampler is not None:
+      sampler.stop()
+    start, end = chunk
+    name = f"{os.getpid()}-{start}-{end}"
+    chunks_dir = get_chunks_dir(profile_dir)
+    profiler.dump_stats(str(chunks_dir / f"{name}.prof"))
+    if sampler is not None:
+      (chunks_dir / f"{name}.folded").write_text(get_collapsed_stacks_content(sampler.stacks), "UTF-8")
+
+
+def get_collapsed_stacks_content(stacks: Counter) -> str:
+  return "".join(
+    f"{stack} {count}\n"
+    for stack, count in sorted(stacks.items())
+  )
+
+
+def get_module_names() -> Dict[str, str]:
+  """ returns the names of the imported modules by their files """
+  result = {}
+  for name, module in list(sys.modules.items()):
+    filename = getattr(module, "__file__", None)
+    if filename is not None:
+      result[os.path.realpath(filename)] = name
+  return result
+
+
+def is_in_stdlib(filename: str) -> bool:
+  stdlib_dirs = {Path(sysconfig.get_paths()[name]).resolve() for name in ("stdlib", "platstdlib")}
+  return any(stdlib_dir in Path(filename).resolve().parents for stdlib_dir in stdlib_dirs)
+
+
+def get_package(filename: str, module_names: Optional[Dict[str, str]] = None) -> Optional[str]:
+  """ returns the package of the function (modules of this package separately) or None for built-in functions """
+  if filename == "~":
+    return None
+  parts = Path(filename).parts
+  if "dict_from_pypinyin" in parts:
+    return f"dict_from_pypinyin.{Path(filename).stem}"
+  # e.g., dist-packages on Debian
+  for packages_dir in ("site-packages", "dist-packages"):
+    if packages_dir in parts:
+      packages_dir_i = len(parts) - 1 - parts[::-1].index(packages_dir)
+      if packages_dir_i + 1 < len(parts):
+        return Path(parts[packages_dir_i + 1]).stem
+  if module_names is None:
+    module_names = get_module_names()
+  module_name = module_names.get(os.path.realpath(filename))
+  if module_name is not None and not is_in_stdlib(filename):
+    return module_name.split(".")[0]
+  return "python"
+
+
+def get_package_times(stats: pstats.Stats) -> Dict[str, float]:
+  """ sums the time spent in the functions (excl. subcalls) per package; time of built-in functions is attributed to the package of their callers """
+  result: Dict[str, float] = defaultdict(float)
+  module_names = get_module_names()
+  for function, (_, _, total_time, _, callers) in stats.stats.items():  # pylint: disable=no-member
+    package = get_package(function[0], module_names)
+    if package is not None:
+      result[package] += total_time
+      continue
+    if len(callers) == 0:
+      result["built-in"] += total_time
+      continue
+    for caller, (_, _, caller_total_time, _) in callers.items():
+      caller_package = get_package(caller[0], module_names)
+      result["built-in" if caller_package is None else caller_package] += caller_total_time
+  return result
+
+
+def get_report(stats: pstats.Stats, top: int) -> str:
+  package_times = get_package_times(stats)
+  total = sum(package_times.values())
+  lines = ["Time per package (excl. subcalls; built-in functions are attributed to their callers):"]
+  for package, package_time in sorted(package_times.items(), key=lambda item: (-item[1], item[0])):
+    share = package_time / total * 100 if total > 0 else 0.0
+    lines.append(f"{package_time:10.3f}s {share:5.1f}% {package}")
+  stream = io.StringIO()
+  stats.stream = stream
+  # otherwise the files of all chunks are listed
+  stats.files = []
+  stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+  stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+  return "\n".join(lines) + "\n" + stream.getvalue()
+
+
+def merge_profiles(profile_dir: Path) -> bool:
+  """ merges the results of all chunks into one profile, a report and (if sampled) collapsed stacks; returns False if no chunk was profiled """
+  chunks_dir = get_chunks_dir(profile_dir)
+  profile_paths = sorted(chunks_dir.glob("*.prof"))
+  if len(profile_paths) == 0:
+    return False
+  stats = pstats.Stats(str(profile_paths[0]), stream=io.StringIO())
+  for profile_path in profile_paths[1:]:
+    stats.add(str(profile_path))
+  stats.dump_stats(str(profile_dir / PROFILE_FILE_NAME))
+  (profile_dir / REPORT_FILE_NAME).write_text(get_report(stats, REPORT_TOP), "UTF-8")
+
+  stacks_paths = sorted(chunks_dir.glob("*.folded"))
+  if len(stacks_paths) > 0:
+    stacks = Counter()
+    for stacks_path in stacks_paths:
+      for line in stacks_path.read_text("UTF-8").splitlines():
+        stack, count = line.rsplit(" ", maxsplit=1)
+        stacks[stack] += int(count)
+    (profile_dir / COLLAPSED_STACKS_FILE_NAME).write_text(
+      get_collapsed_stacks_content(stacks), "UTF-8")
+  return True
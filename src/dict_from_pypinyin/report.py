@@ -0,0 +1,24 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from pronunciation_dictionary import Word
+
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.supervision import QuarantineEntry
+
+
+@dataclass()
+class ConversionReport():
+  # words that couldn't be processed in supervised mode with reason (timeout, memory, exception) and details; in vocabulary order
+  quarantined_words: Dict[Word, QuarantineEntry] = field(default_factory=OrderedDict)
+  # peak resident set size of the main process and of the largest worker process in bytes (if available)
+  peak_rss: Optional[int] = None
+  peak_worker_rss: Optional[int] = None
+  # symbols that caused words to be OOV
+  oov_statistics: OOVStatistics = field(default_factory=OOVStatistics)
+  # duration of the conversion and the part of it spent waiting for the next chunk in vocabulary order while later chunks were already completed (in seconds)
+  duration: Optional[float] = None
+  head_of_line_wait: Optional[float] = None
+  # largest amount of completed chunks that waited for an earlier one
+  max_buffered_chunks: Optional[int] = None
@@ -0,0 +1,359 @@
+import json
+import mmap
+import sys
+import unicodedata
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from pronunciation_dictionary import Pronunciation, Pronunciations, Symbol, Word
+
+from dict_from_pypinyin.checkpoint import write_atomic
+
+REVERSE_INDEX_VERSION = 2
+# separates the symbols of a pronunciation in the stored keys
+SYMBOL_SEPARATOR = "\x1f"
+# tone marks of the styles TONE (combining characters after decomposition) and BOPOMOFO, tone numbers of the other styles
+TONE_MARKS = frozenset("\u0300\u0301\u0304\u030c" + "\u02ca\u02c7\u02cb\u02d9" + "012345")
+# the file starts with the size of the JSON header, which describes the position of the blobs after it
+HEADER_SIZE_BYTES = 8
+# blobs start at multiples of this size so that they can be used as arrays in place
+BLOB_ALIGNMENT = 8
+
+# e.g., bytes, a memory-mapped file
+Buffer = Union[bytes, mmap.mmap]
+
+
+def get_toneless_symbol(symbol: Symbol) -> Symbol:
+  decomposed = unicodedata.normalize("NFD", symbol)
+  result = unicodedata.normalize("NFC", "".join(c for c in decomposed if c not in TONE_MARKS))
+  # e.g. for symbols which consist of a tone mark only
+  return result if result != "" else symbol
+
+
+def get_toneless_pronunciation(pronunciation: Pronunciation) -> Pronunciation:
+  return tuple(get_toneless_symbol(symbol) for symbol in pronunciation)
+
+
+def get_key(pronunciation: Sequence[Symbol]) -> bytes:
+  # UTF-8 preserves the order of the code points, i.e., sorted keys stay sorted
+  return SYMBOL_SEPARATOR.join(pronunciation).encode("UTF-8")
+
+
+def get_ids_typecode(max_id: int) -> str:
+  return "I" if max_id < 2**32 else "Q"
+
+
+class StringTable():
+  """ Sorted or unsorted strings that are stored as one UTF-8 blob (which starts at `start` in `data`) and the offsets of the strings in it. """
+
+  def __init__(self, data: Buffer, start: int, offsets: Sequence[int]) -> None:
+    # string i is data[start + offsets[i]:start + offsets[i + 1]]
+    self.data = data
+    self.start = start
+    self.offsets = offsets
+
+  def __len__(self) -> int:
+    return len(self.offsets) - 1
+
+  def get_bytes(self, index: int) -> bytes:
+    return self.data[self.start + self.offsets[index]:self.start + self.offsets[index + 1]]
+
+  def get_blob(self) -> bytes:
+    return self.data[self.start:self.start + self.offsets[-1]]
+
+  def __getitem__(self, index: int) -> str:
+    return self.get_bytes(index).decode("UTF-8")
+
+  def find(self, value: bytes) -> Optional[int]:
+    """ returns the index of the value in the sorted strings or None """
+    low, high = 0, len(self)
+    while low < high:
+      middle = (low + high) // 2
+      if self.get_bytes(middle) < value:
+        low = middle + 1
+      else:
+        high = middle
+    if low < len(self) and self.get_bytes(low) == value:
+      return low
+    return None
+
+
+def get_string_table(strings: Sequence[str]) -> StringTable:
+  encoded = [string.encode("UTF-8") for string in strings]
+  offsets = array("Q", [0])
+  for string in encoded:
+    offsets.append(offsets[-1] + len(string))
+  return StringTable(b"".join(encoded), 0, offsets)
+
+
+class Postings():
+  """ Maps sorted keys to the IDs word_ids[offsets[i]:offsets[i + 1]] of key i. """
+
+  def __init__(self, keys: StringTable, offsets: Sequence[int], word_ids: Sequence[int]) -> None:
+    self.keys = keys
+    self.offsets = offsets
+    self.word_ids = word_ids
+
+  def get(self, key: bytes) -> List[int]:
+    key_i = self.keys.find(key)
+    if key_i is None:
+      return []
+    return list(self.word_ids[self.offsets[key_i]:self.offsets[key_i + 1]])
+
+
+class ReverseIndex():
+  """ Maps pronunciations (syllable sequences) to the IDs (indices in the vocabulary) of the words that have them. """
+
+  def __init__(self, postings: Postings, toneless_postings: Optional[Postings], indexed_ids: Sequence[int], indexed_words: StringTable, content: Optional[mmap.mmap] = None) -> None:
+    self.postings = postings
+    self.toneless_postings = toneless_postings
+    # sorted IDs of the indexed words and the words
+    self.indexed_ids = indexed_ids
+    self.indexed_words = indexed_words
+    # memory-mapped file of a loaded index
+    self.__content = content
+
+  def __enter__(self) -> "ReverseIndex":
+    return self
+
+  def __exit__(self, *args: Any) -> None:
+    self.close()
+
+  def close(self) -> None:
+    """ unmaps the file of a loaded index, which can't be queried afterwards """
+    if self.__content is None:
+      return
+    arrays = [self.indexed_ids, self.indexed_words.offsets]
+    for postings in (self.postings, self.toneless_postings):
+      if postings is not None:
+        arrays.extend((postings.keys.offsets, postings.offsets, postings.word_ids))
+    release_views(arrays)
+    self.__content.close()
+    self.__content = None
+
+  @property
+  def has_toneless_keys(self) -> bool:
+    return self.toneless_postings is not None
+
+  def __len__(self) -> int:
+    return len(self.postings.keys)
+
+  def get_keys(self, toneless: bool = False) -> List[Pronunciation]:
+    postings = self.__get_postings(toneless)
+    return [
+      tuple(postings.keys[key_i].split(SYMBOL_SEPARATOR))
+      for key_i in range(len(postings.keys))
+    ]
+
+  def get_indexed_words(self) -> List[Word]:
+    return [self.indexed_words[word_i] for word_i in range(len(self.indexed_words))]
+
+  def __get_postings(self, toneless: bool) -> Postings:
+    if not toneless:
+      return self.postings
+    if self.toneless_postings is None:
+      raise ValueError("Reverse index has no toneless keys!")
+    return self.toneless_postings
+
+  def get_word_ids(self, pronunciation: Sequence[Symbol], toneless: bool = False) -> List[int]:
+    postings = self.__get_postings(toneless)
+    if toneless:
+      pronunciation = get_toneless_pronunciation(pronunciation)
+    return postings.get(get_key(pronunciation))
+
+  def get_word(self, word_id: int) -> Word:
+    low, high = 0, len(self.indexed_ids)
+    while low < high:
+      middle = (low + high) // 2
+      if self.indexed_ids[middle] < word_id:
+        low = middle + 1
+      else:
+        high = middle
+    if low == len(self.indexed_ids) or self.indexed_ids[low] != word_id:
+      raise ValueError("Word ID is not indexed!")
+    return self.indexed_words[low]
+
+  def get_words(self, pronunciation: Sequence[Symbol], toneless: bool = False) -> List[Word]:
+    return [self.get_word(word_id) for word_id in self.get_word_ids(pronunciation, toneless)]
+
+  def save(self, path: Path) -> None:
+    """ saves the index as a JSON header followed by the UTF-8 strings and the little-endian arrays (no pickle) """
+    blobs: Dict[str, Tuple[Optional[str], bytes]] = {}
+
+    def add_postings(prefix: str, postings: Postings) -> None:
+      blobs[f"{prefix}keys"] = (None, postings.keys.get_blob())
+      blobs[f"{prefix}key_offsets"] = get_array_blob("Q", postings.keys.offsets)
+      blobs[f"{prefix}offsets"] = get_array_blob("Q", postings.offsets)
+      blobs[f"{prefix}word_ids"] = get_array_blob(get_typecode(postings.word_ids), postings.word_ids)
+
+    add_postings("", self.postings)
+    if self.toneless_postings is not None:
+      add_postings("toneless_", self.toneless_postings)
+    blobs["indexed_ids"] = get_array_blob(get_typecode(self.indexed_ids), self.indexed_ids)
+    blobs["indexed_words"] = (None, self.indexed_words.get_blob())
+    blobs["indexed_word_offsets"] = get_array_blob("Q", self.indexed_words.offsets)
+
+    header: Dict[str, Any] = {
+      "version": REVERSE_INDEX_VERSION,
+      "toneless": self.toneless_postings is not None,
+      "blobs": {},
+    }
+    position = 0
+    for name, (typecode, blob) in blobs.items():
+      header["blobs"][name] = {"start": position, "size": len(blob), "typecode": typecode}
+      position += get_padded_size(len(blob))
+    header_bytes = json.dumps(header).encode("UTF-8")
+    header_bytes += b" " * (get_padded_size(len(header_bytes)) - len(header_bytes))
+
+    parts = [len(header_bytes).to_bytes(HEADER_SIZE_BYTES, "little"), header_bytes]
+    for _, blob in blobs.values():
+      parts.append(blob)
+      parts.append(b"\0" * (get_padded_size(len(blob)) - len(blob)))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, b"".join(parts))
+
+
+def get_padded_size(size: int) -> int:
+  return -(-size // BLOB_ALIGNMENT) * BLOB_ALIGNMENT
+
+
+def get_typecode(values: Sequence[int]) -> str:
+  if isinstance(values, array):
+    return values.typecode
+  assert isinstance(values, memoryview)
+  return values.format
+
+
+def get_array_blob(typecode: str, values: Sequence[int]) -> Tuple[str, bytes]:
+  result = array(typecode, values)
+  if sys.byteorder == "big":
+    result.byteswap()
+  return typecode, result.tobytes()
+
+
+def release_views(arrays: Iterable[Sequence[int]]) -> None:
+  """ releases the arrays that are views of a memory-mapped file so that it can be closed """
+  for values in arrays:
+    if isinstance(values, memoryview):
+      values.release()
+
+
+def load_reverse_index(path: Path) -> ReverseIndex:
+  """
+  Memory-maps the index; queries read only the parts of the file they need.
+  The file stays mapped until the index is closed, e.g., by using it as a context manager.
+  """
+  with path.open("rb") as file:
+    try:
+      content = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError as error:
+      # empty file
+      raise ValueError("Reverse index has an unsupported format!") from error
+  views: List[memoryview] = []
+  try:
+    return get_reverse_index(content, views)
+  except BaseException:
+    release_views(views)
+    content.close()
+    raise
+
+
+def get_reverse_index(content: mmap.mmap, views: List[memoryview]) -> ReverseIndex:
+  """ returns the index stored in the content; the created views of the content are added to `views` """
+  try:
+    header_size = int.from_bytes(content[:HEADER_SIZE_BYTES], "little")
+    header = json.loads(content[HEADER_SIZE_BYTES:HEADER_SIZE_BYTES + header_size].decode("UTF-8"))
+  except ValueError as error:
+    raise ValueError("Reverse index has an unsupported format!") from error
+  if not isinstance(header, dict) or header.get("version") != REVERSE_INDEX_VERSION:
+    raise ValueError("Reverse index has an unsupported format!")
+  data_start = HEADER_SIZE_BYTES + header_size
+  blobs = header["blobs"]
+
+  def get_range(name: str) -> Tuple[int, int]:
+    start = data_start + blobs[name]["start"]
+    end = start + blobs[name]["size"]
+    if end > len(content):
+      raise ValueError("Reverse index is incomplete!")
+    return start, end
+
+  def get_array(name: str) -> Sequence[int]:
+    start, end = get_range(name)
+    typecode = blobs[name]["typecode"]
+    if typecode not in ("I", "Q"):
+      raise ValueError("Reverse index has an unsupported format!")
+    if sys.byteorder == "big":
+      result = array(typecode, content[start:end])
+      result.byteswap()
+      return result
+    result = memoryview(content)[start:end].cast(typecode)
+    views.append(result)
+    return result
+
+  def load_string_table(name: str, offsets_name: str) -> StringTable:
+    start, _ = get_range(name)
+    return StringTable(content, start, get_array(offsets_name))
+
+  def get_postings(prefix: str) -> Postings:
+    keys = load_string_table(f"{prefix}keys", f"{prefix}key_offsets")
+    return Postings(keys, get_array(f"{prefix}offsets"), get_array(f"{prefix}word_ids"))
+
+  return ReverseIndex(
+    get_postings(""),
+    get_postings("toneless_") if header["toneless"] else None,
+    get_array("indexed_ids"),
+    load_string_table("indexed_words", "indexed_word_offsets"),
+    content,
+  )
+
+
+def get_postings_from_dict(postings: Dict[bytes, List[int]], max_id: int) -> Postings:
+  keys = sorted(postings)
+  key_offsets = array("Q", [0])
+  offsets = array("Q", [0])
+  word_ids = array(get_ids_typecode(max_id))
+  for key in keys:
+    key_offsets.append(key_offsets[-1] + len(key))
+    word_ids.extend(postings[key])
+    offsets.append(len(word_ids))
+  return Postings(StringTable(b"".join(keys), 0, key_offsets), offsets, word_ids)
+
+
+class ReverseIndexBuilder():
+  """ Collects the pronunciations of the words during the conversion; the words need to be added in order of their IDs. """
+
+  def __init__(self) -> None:
+    self.postings: Dict[Pronunciation, List[int]] = defaultdict(list)
+    self.indexed_ids = array("Q")
+    self.indexed_words: List[Word] = []
+
+  def add(self, word_id: int, word: Word, pronunciations: Pronunciations) -> None:
+    assert len(self.indexed_ids) == 0 or self.indexed_ids[-1] < word_id
+    self.indexed_ids.append(word_id)
+    self.indexed_words.append(word)
+    for pronunciation in pronunciations.keys():
+      self.postings[pronunciation].append(word_id)
+
+  def build(self, toneless: bool) -> ReverseIndex:
+    """ creates the index; the toneless keys are derived from the pronunciations, not from the words again """
+    for pronunciation in self.postings.keys():
+      if any(SYMBOL_SEPARATOR in symbol for symbol in pronunciation):
+        raise ValueError("Pronunciations must not contain the separator of the reverse index!")
+    max_id = self.indexed_ids[-1] if len(self.indexed_ids) > 0 else 0
+    postings = get_postings_from_dict(
+      {get_key(pronunciation): ids for pronunciation, ids in self.postings.items()}, max_id)
+
+    toneless_postings = None
+    if toneless:
+      toneless_ids: Dict[bytes, List[int]] = defaultdict(list)
+      for pronunciation, ids in self.postings.items():
+        toneless_ids[get_key(get_toneless_pronunciation(pronunciation))].extend(ids)
+      for ids in toneless_ids.values():
+        # a word can have multiple pronunciations with the same toneless key
+        ids[:] = sorted(set(ids))
+      toneless_postings = get_postings_from_dict(toneless_ids, max_id)
+
+    indexed_ids = array(get_ids_typecode(max_id), self.indexed_ids)
+    return ReverseIndex(postings, toneless_postings, indexed_ids, get_string_table(self.indexed_words))
@@ -0,0 +1,344 @@
+import hashlib
+import heapq
+import json
+import os
+import sys
+from array import array
+from collections import OrderedDict
+from contextlib import ExitStack
+from logging import getLogger
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Generator, List, Optional, Set, Tuple
+
+from ordered_set import OrderedSet
+from pronunciation_dictionary import Pronunciations, Word
+from pypinyin import Style
+from word_to_pronunciation import Options
+
+from dict_from_pypinyin.checkpoint import (get_oov_statistics_content, get_pronunciations_line,
+                                           get_vocabulary_hash, parse_oov_statistics,
+                                           parse_pronunciations_line, write_atomic)
+from dict_from_pypinyin.core import (convert_chinese_to_pinyin, get_checkpoint_options,
+                                     validate_exact_type, validate_type)
+from dict_from_pypinyin.frequencies import FrequencyWeighting
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.report import ConversionReport
+from dict_from_pypinyin.types import Writer
+
+SHARDS_MANIFEST_NAME = "shards.json"
+SHARD_MANIFEST_NAME = "manifest.json"
+SHARD_VOCABULARY_NAME = "vocabulary.txt"
+SHARD_INDICES_NAME = "indices.bin"
+# one JSON array per resolved word: the word and its pronunciations as pairs of symbols and weight
+SHARD_DICTIONARY_NAME = "dictionary.jsonl"
+SHARD_OOV_NAME = "oov.txt"
+SHARD_OOV_STATISTICS_NAME = "oov-statistics.json"
+# written last; marks a shard as processed
+SHARD_RESULT_NAME = "result.json"
+# results are only parsed, not unpickled, because shards can be processed on other machines
+SHARDING_VERSION = 3
+# amount of indices or resolved words that are written at once
+BATCH_SIZE = 10_000
+
+# global index, word and its pronunciations (empty if unresolved)
+IndexedResult = Tuple[int, Word, Pronunciations]
+
+
+def get_shard(word: Word, n_shards: int) -> int:
+  """ returns the shard of the word; independent of the process in contrast to `hash` """
+  digest = hashlib.blake2b(word.encode("UTF-8"), digest_size=8).digest()
+  return int.from_bytes(digest, "little") % n_shards
+
+
+def get_shard_dir(shards_dir: Path, shard: int) -> Path:
+  return shards_dir / f"shard-{shard:04d}"
+
+
+def write_indices(file: BinaryIO, indices: "array[int]") -> None:
+  # stored in little-endian byte order so that shards can be processed on other machines
+  if sys.byteorder == "big":
+    indices.byteswap()
+  indices.tofile(file)
+
+
+def iterate_indices(path: Path) -> Generator[int, None, None]:
+  with path.open("rb") as file:
+    while True:
+      indices = array("Q")
+      try:
+        indices.fromfile(file, BATCH_SIZE)
+      except EOFError:
+        # fewer indices than requested were left; they were read anyway
+        pass
+      if len(indices) == 0:
+        break
+      if sys.byteorder == "big":
+        indices.byteswap()
+      yield from indices
+
+
+def iterate_words(path: Path) -> Generator[Word, None, None]:
+  """ yields the words of a file of the shard, which contains each word followed by a line break """
+  with path.open("r", encoding="UTF-8", newline="\n") as file:
+    for line in file:
+      yield line[:-1]
+
+
+def write_json(path: Path, content: Dict[str, Any]) -> None:
+  write_atomic(path, json.dumps(content, ensure_ascii=False, indent=2).encode("UTF-8"))
+
+
+def read_json(path: Path) -> Dict[str, Any]:
+  return json.loads(path.read_text("UTF-8"))
+
+
+def remove_shard_result(shard_dir: Path) -> None:
+  # the result file first so that the shard is not considered processed anymore
+  for name in (SHARD_RESULT_NAME, SHARD_DICTIONARY_NAME, SHARD_OOV_NAME, SHARD_OOV_STATISTICS_NAME):
+    path = shard_dir / name
+    if path.is_file():
+      path.unlink()
+
+
+def split_vocabulary(vocabulary: OrderedSet[Word], n_shards: int, shards_dir: Path) -> List[int]:
+  """
+  Partitions the vocabulary by the hashes of the words into shards that can be processed independently (e.g., on other machines) with `run_shard` and merged with `merge_shards`; returns the amount of words per shard.
+  Each shard is a directory containing a manifest, its words in order of the vocabulary and their indices in the vocabulary.
+  """
+  validate_exact_type(vocabulary, OrderedSet)
+  validate_type(n_shards, int)
+  if not n_shards > 0:
+    raise ValueError("Amount of shards needs to be greater than zero!")
+  validate_type(shards_dir, Path)
+
+  manifest_path = shards_dir / SHARDS_MANIFEST_NAME
+  if manifest_path.is_file():
+    manifest_path.unlink()
+  shard_dirs = [get_shard_dir(shards_dir, shard) for shard in range(n_shards)]
+  for shard_dir in shard_dirs:
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    # the manifest is written last
+    remove_shard_result(shard_dir)
+    (shard_dir / SHARD_MANIFEST_NAME).unlink(missing_ok=True)
+
+  vocabulary_hash = get_vocabulary_hash(vocabulary)
+  n_words = [0] * n_shards
+  indices = [array("Q") for _ in range(n_shards)]
+  with ExitStack() as stack:
+    words_files = [
+      stack.enter_context((shard_dir / SHARD_VOCABULARY_NAME).open("w", encoding="UTF-8", newline="\n"))
+      for shard_dir in shard_dirs
+    ]
+    indices_files = [
+      stack.enter_context((shard_dir / SHARD_INDICES_NAME).open("wb"))
+      for shard_dir in shard_dirs
+    ]
+    for word_i, word in enumerate(vocabulary):
+      if "\n" in word:
+        raise ValueError("Words must not contain line breaks!")
+      shard = get_shard(word, n_shards)
+      words_files[shard].write(f"{word}\n")
+      indices[shard].append(word_i)
+      n_words[shard] += 1
+      if len(indices[shard]) == BATCH_SIZE:
+        write_indices(indices_files[shard], indices[shard])
+        indices[shard] = array("Q")
+    for shard in range(n_shards):
+      write_indices(indices_files[shard], indices[shard])
+
+  for shard, shard_dir in enumerate(shard_dirs):
+    write_json(shard_dir / SHARD_MANIFEST_NAME, {
+      "version": SHARDING_VERSION,
+      "vocabulary_hash": vocabulary_hash,
+      "shard": shard,
+      "n_shards": n_shards,
+      "n_words": n_words[shard],
+    })
+  write_json(manifest_path, {
+    "version": SHARDING_VERSION,
+    "vocabulary_hash": vocabulary_hash,
+    "n_shards": n_shards,
+    "n_words": len(vocabulary),
+  })
+  return n_words
+
+
+def load_shard_manifest(shard_dir: Path) -> Dict[str, Any]:
+  path = shard_dir / SHARD_MANIFEST_NAME
+  if not path.is_file():
+    raise ValueError(f"Shard \"{shard_dir}\" has no manifest!")
+  result = read_json(path)
+  if result.get("version") != SHARDING_VERSION:
+    raise ValueError(f"Shard \"{shard_dir}\" has an unsupported format!")
+  return result
+
+
+def run_shard(shard_dir: Path, style: Style = Style.TONE3, v_to_u: bool = True, strict: bool = True, neutral_tone_with_five: bool = True, weight: float = 1.0, trim_symbols: Optional[Set[str]] = None, split_on_hyphen: bool = True, try_without_trimming: bool = False, try_without_splitting: bool = False, weight_by_frequency: bool = False, top_k: Optional[int] = None, cumulative_probability: Optional[float] = None, **execution_options: Any) -> Tuple[int, int]:
+  """
+  Converts the words of the shard like `convert_chinese_to_pinyin` (`execution_options` are passed to it, e.g., `n_jobs` or `execution`) and saves the result in the shard directory; returns the amount of resolved and unresolved words.
+  """
+  validate_type(shard_dir, Path)
+  manifest = load_shard_manifest(shard_dir)
+  if trim_symbols is None:
+    trim_symbols = set()
+  remove_shard_result(shard_dir)
+
+  vocabulary = OrderedSet(iterate_words(shard_dir / SHARD_VOCABULARY_NAME))
+  if len(vocabulary) != manifest["n_words"]:
+    raise ValueError(f"Vocabulary of shard \"{shard_dir}\" doesn't match its manifest!")
+
+  options = Options("".join(trim_symbols), split_on_hyphen,
+                    try_without_trimming, try_without_splitting, weight)
+  frequency_weighting = FrequencyWeighting(
+    top_k, cumulative_probability) if weight_by_frequency else None
+  report = ConversionReport()
+  n_resolved = 0
+  batch: List[str] = []
+
+  with (shard_dir / SHARD_DICTIONARY_NAME).open("w", encoding="UTF-8", newline="\n") as dictionary_file:
+    def write_pronunciations(word: Word, pronunciations: Pronunciations) -> None:
+      nonlocal n_resolved
+      batch.append(get_pronunciations_line(word, pronunciations))
+      n_resolved += 1
+      if len(batch) == BATCH_SIZE:
+        dictionary_file.writelines(batch)
+        batch.clear()
+
+    _, unresolved_words = convert_chinese_to_pinyin(
+      vocabulary, style, v_to_u, strict, neutral_tone_with_five, weight, trim_symbols, split_on_hyphen, report=report, weight_by_frequency=weight_by_frequency, top_k=top_k, cumulative_probability=cumulative_probability, writer=write_pronunciations, try_without_trimming=try_without_trimming, try_without_splitting=try_without_splitting, **execution_options)
+    dictionary_file.writelines(batch)
+    dictionary_file.flush()
+    os.fsync(dictionary_file.fileno())
+
+  write_atomic(shard_dir / SHARD_OOV_NAME, "".join(f"{word}\n" for word in unresolved_words).encode("UTF-8"))
+  indices = array("Q", iterate_indices(shard_dir / SHARD_INDICES_NAME))
+  report.oov_statistics.remap_indices(indices)
+  write_json(shard_dir / SHARD_OOV_STATISTICS_NAME, get_oov_statistics_content(report.oov_statistics))
+
+  write_json(shard_dir / SHARD_RESULT_NAME, {
+    "version": SHARDING_VERSION,
+    "vocabulary_hash": manifest["vocabulary_hash"],
+    # the same options that checkpoints are compared by
+    "options": get_checkpoint_options(style, v_to_u, strict, neutral_tone_with_five, weight, options, frequency_weighting),
+    "n_resolved": n_resolved,
+    "n_unresolved": len(unresolved_words),
+  })
+  return n_resolved, len(unresolved_words)
+
+
+def __run_shard_process(shard_dir: Path, options: Dict[str, Any]) -> None:
+  run_shard(shard_dir, **options)
+
+
+def run_shards_locally(shards_dir: Path, n_processes: int, **options: Any) -> List[int]:
+  """
+  Runs `run_shard` for all shards of the split as separate processes on this machine (at most `n_processes` at a time); returns the shards that failed.
+  """
+  validate_type(shards_dir, Path)
+  validate_type(n_processes, int)
+  if not n_processes > 0:
+    raise ValueError("Amount of processes needs to be greater than zero!")
+  manifest = load_shards_manifest(shards_dir)
+  logger = getLogger(__name__)
+  # shards are processed in fresh interpreters like on separate machines
+  context = get_context("spawn")
+  pending = list(range(manifest["n_shards"]))
+  running: Dict[int, Any] = {}
+  failed = []
+  while len(pending) > 0 or len(running) > 0:
+    while len(pending) > 0 and len(running) < n_processes:
+      shard = pending.pop(0)
+      process = context.Process(target=__run_shard_process,
+                                args=(get_shard_dir(shards_dir, shard), options))
+      process.start()
+      running[shard] = process
+    # reap whichever processes finished so that their slots are refilled right away
+    finished_sentinels = set(wait([process.sentinel for process in running.values()]))
+    for shard, process in list(running.items()):
+      if process.sentinel not in finished_sentinels:
+        continue
+      process.join()
+      del running[shard]
+      if process.exitcode != 0:
+        logger.error(f"Shard {shard} failed with exit code {process.exitcode}!")
+        failed.append(shard)
+  return sorted(failed)
+
+
+def load_shards_manifest(shards_dir: Path) -> Dict[str, Any]:
+  path = shards_dir / SHARDS_MANIFEST_NAME
+  if not path.is_file():
+    raise ValueError(f"Directory \"{shards_dir}\" contains no split vocabulary!")
+  result = read_json(path)
+  if result.get("version") != SHARDING_VERSION:
+    raise ValueError(f"Split vocabulary in \"{shards_dir}\" has an unsupported format!")
+  return result
+
+
+def iterate_resolved_words(path: Path) -> Generator[Tuple[Word, Pronunciations], None, None]:
+  with path.open("r", encoding="UTF-8", newline="\n") as file:
+    for line in file:
+      yield parse_pronunciations_line(line)
+
+
+def iterate_shard_results(shard_dir: Path) -> Generator[IndexedResult, None, None]:
+  """ yields the results of the words of the shard in order of the vocabulary """
+  resolved_words = iterate_resolved_words(shard_dir / SHARD_DICTIONARY_NAME)
+  unresolved_words = iterate_words(shard_dir / SHARD_OOV_NAME)
+  next_resolved = next(resolved_words, None)
+  next_unresolved = next(unresolved_words, None)
+  for word_i, word in zip(iterate_indices(shard_dir / SHARD_INDICES_NAME), iterate_words(shard_dir / SHARD_VOCABULARY_NAME)):
+    if next_resolved is not None and next_resolved[0] == word:
+      yield word_i, word, next_resolved[1]
+      next_resolved = next(resolved_words, None)
+    elif next_unresolved == word:
+      yield word_i, word, OrderedDict()
+      next_unresolved = next(unresolved_words, None)
+    else:
+      raise ValueError(f"Result of shard \"{shard_dir}\" doesn't match its vocabulary!")
+  if next_resolved is not None or next_unresolved is not None:
+    raise ValueError(f"Result of shard \"{shard_dir}\" doesn't match its vocabulary!")
+
+
+def merge_shards(shards_dir: Path, writer: Writer) -> Tuple[OrderedSet[Word], OOVStatistics]:
+  """
+  Passes the resolved words of all processed shards to the writer in order of the vocabulary that was split; returns the unresolved words (in the same order) and the statistics of their symbols.
+  """
+  validate_type(shards_dir, Path)
+  if not callable(writer):
+    raise ValueError("Writer needs to be callable!")
+  manifest = load_shards_manifest(shards_dir)
+  shard_dirs = [get_shard_dir(shards_dir, shard) for shard in range(manifest["n_shards"])]
+
+  options = None
+  n_words = 0
+  oov_statistics = OOVStatistics()
+  for shard_dir in shard_dirs:
+    shard_manifest = load_shard_manifest(shard_dir)
+    if shard_manifest["vocabulary_hash"] != manifest["vocabulary_hash"]:
+      raise ValueError(f"Shard \"{shard_dir}\" belongs to another split!")
+    result_path = shard_dir / SHARD_RESULT_NAME
+    if not result_path.is_file():
+      raise ValueError(f"Shard \"{shard_dir}\" wasn't processed!")
+    result = read_json(result_path)
+    if result.get("version") != SHARDING_VERSION or result["vocabulary_hash"] != manifest["vocabulary_hash"]:
+      raise ValueError(f"Result of shard \"{shard_dir}\" doesn't belong to the split!")
+    if options is not None and result["options"] != options:
+      raise ValueError("Shards were processed with different options!")
+    options = result["options"]
+    n_words += result["n_resolved"] + result["n_unresolved"]
+    oov_statistics.update(parse_oov_statistics(read_json(shard_dir / SHARD_OOV_STATISTICS_NAME)))
+  if n_words != manifest["n_words"]:
+    raise ValueError("Shards don't contain the split vocabulary!")
+
+  unresolved_words = OrderedSet()
+  shard_results = (iterate_shard_results(shard_dir) for shard_dir in shard_dirs)
+  for _, word, pronunciations in heapq.merge(*shard_results, key=itemgetter(0)):
+    if len(pronunciations) == 0:
+      unresolved_words.add(word)
+    else:
+      writer(word, pronunciations)
+  return unresolved_words, oov_statistics
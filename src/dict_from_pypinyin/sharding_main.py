@@ -0,0 +1,170 @@
+from argparse import ArgumentParser, Namespace
+from logging import getLogger
+from pathlib import Path
+from tempfile import gettempdir
+from typing import Any, Dict
+
+from pronunciation_dictionary import SerializationOptions
+
+from dict_from_pypinyin.argparse_helper import (add_encoding_argument, add_n_jobs_argument,
+                                                add_serialization_group, get_optional,
+                                                parse_existing_directory, parse_existing_file,
+                                                parse_path, parse_positive_integer)
+from dict_from_pypinyin.execution import ExecutionOptions
+from dict_from_pypinyin.main import (add_conversion_arguments, add_execution_arguments,
+                                     add_oov_report_arguments, get_dictionary_writer, open_atomic,
+                                     write_oov_files)
+from dict_from_pypinyin.sharding import (merge_shards, run_shard, run_shards_locally,
+                                         split_vocabulary)
+from dict_from_pypinyin.vocabulary import read_vocabulary
+
+
+def get_split_parser(parser: ArgumentParser):
+  parser.description = "Split the vocabulary by the hashes of the words into shards that can be processed independently, e.g., on multiple machines."
+  parser.add_argument("vocabulary", metavar='VOCABULARY-PATH', type=parse_existing_file,
+                      help="file containing the vocabulary (words separated by line)")
+  add_encoding_argument(parser, "--vocabulary-encoding", "encoding of vocabulary")
+  parser.add_argument("shards_dir", metavar='SHARDS-DIRECTORY', type=parse_path,
+                      help="directory to output the shards to (one subdirectory per shard)")
+  parser.add_argument("-n", "--n-shards", metavar="NUMBER", type=parse_positive_integer,
+                      help="amount of shards", required=True)
+  add_n_jobs_argument(parser)
+  return split_vocabulary_file
+
+
+def split_vocabulary_file(ns: Namespace) -> bool:
+  logger = getLogger(__name__)
+  try:
+    vocabulary_words = read_vocabulary(ns.vocabulary, ns.vocabulary_encoding, ns.n_jobs)
+  except Exception as ex:
+    logger.error("Vocabulary couldn't be read.")
+    logger.debug(ex)
+    return False
+
+  try:
+    n_words = split_vocabulary(vocabulary_words, ns.n_shards, ns.shards_dir)
+  except ValueError as ex:
+    logger.error(ex)
+    return False
+  except OSError as ex:
+    logger.error("Shards couldn't be written.")
+    logger.debug(ex)
+    return False
+
+  logger.info(
+    f"Split {len(vocabulary_words)} word(s) into {ns.n_shards} shard(s) with {min(n_words)} to {max(n_words)} word(s) each.")
+  logger.info(f"Written shards to: \"{ns.shards_dir.absolute()}\".")
+  return True
+
+
+def get_options(ns: Namespace) -> Dict[str, Any]:
+  result = {
+    "style": ns.style,
+    "v_to_u": not ns.ü_to_v,
+    "strict": not ns.non_strict,
+    "neutral_tone_with_five": ns.neutral_tone_with_five,
+    "weight": ns.weight,
+    "trim_symbols": set(ns.trim),
+    "split_on_hyphen": ns.split_on_hyphen,
+    "try_without_trimming": ns.try_without_trimming,
+    "try_without_splitting": ns.try_without_splitting,
+    "weight_by_frequency": ns.weight_by_frequency,
+    "top_k": ns.top_k,
+    "cumulative_probability": ns.cumulative_probability,
+    "n_jobs": ns.n_jobs,
+    "maxtasksperchild": ns.maxtasksperchild,
+    "chunksize": ns.chunksize,
+    "execution": ExecutionOptions(
+      engine=ns.engine,
+      max_buffered_chunks=ns.max_buffered_chunks,
+      supervised=ns.supervised,
+      chunk_timeout=ns.chunk_timeout,
+      max_memory=ns.max_memory,
+    ),
+  }
+  return result
+
+
+def get_run_shard_parser(parser: ArgumentParser):
+  parser.description = "Create the pronunciation dictionary of one shard; the result is saved in the directory of the shard."
+  parser.add_argument("shard_dir", metavar='SHARD-DIRECTORY', type=parse_existing_directory,
+                      help="directory of the shard")
+  add_conversion_arguments(parser)
+  add_execution_arguments(parser)
+  return run_shard_dir
+
+
+def run_shard_dir(ns: Namespace) -> bool:
+  logger = getLogger(__name__)
+  try:
+    n_resolved, n_unresolved = run_shard(ns.shard_dir, silent=False, **get_options(ns))
+  except ValueError as ex:
+    logger.error(ex)
+    return False
+  except OSError as ex:
+    logger.error("Result of the shard couldn't be written.")
+    logger.debug(ex)
+    return False
+  logger.info(f"Resolved {n_resolved} of {n_resolved + n_unresolved} word(s) of the shard.")
+  return True
+
+
+def get_run_locally_parser(parser: ArgumentParser):
+  parser.description = "Create the pronunciation dictionaries of all shards, each in a separate process on this machine."
+  parser.add_argument("shards_dir", metavar='SHARDS-DIRECTORY', type=parse_existing_directory,
+                      help="directory containing the shards")
+  parser.add_argument("-p", "--n-processes", metavar="NUMBER", type=parse_positive_integer,
+                      help="amount of shards that are processed at the same time (each with --n-jobs jobs)", default=1)
+  add_conversion_arguments(parser)
+  add_execution_arguments(parser)
+  return run_shards_dir_locally
+
+
+def run_shards_dir_locally(ns: Namespace) -> bool:
+  logger = getLogger(__name__)
+  try:
+    failed_shards = run_shards_locally(ns.shards_dir, ns.n_processes, **get_options(ns))
+  except ValueError as ex:
+    logger.error(ex)
+    return False
+  if len(failed_shards) > 0:
+    logger.error(f"{len(failed_shards)} shard(s) failed!")
+    return False
+  logger.info("All shards were processed.")
+  return True
+
+
+def get_merge_parser(parser: ArgumentParser):
+  parser.description = "Merge the pronunciation dictionaries of the processed shards in order of the vocabulary that was split."
+  default_oov_out = Path(gettempdir()) / "oov.txt"
+  parser.add_argument("shards_dir", metavar='SHARDS-DIRECTORY', type=parse_existing_directory,
+                      help="directory containing the shards")
+  parser.add_argument("dictionary", metavar='DICTIONARY-PATH', type=parse_path,
+                      help="path to output the merged dictionary")
+  parser.add_argument("--oov-out", metavar="OOV-PATH", type=get_optional(parse_path),
+                      help="write out-of-vocabulary (OOV) words (i.e., words that can't transcribed) to this file", default=default_oov_out)
+  add_oov_report_arguments(parser)
+  add_serialization_group(parser)
+  return merge_shards_dir
+
+
+def merge_shards_dir(ns: Namespace) -> bool:
+  logger = getLogger(__name__)
+  s_options = SerializationOptions(ns.parts_sep, ns.include_numbers, ns.include_weights)
+
+  # an existing dictionary is only replaced if all shards could be merged
+  try:
+    ns.dictionary.parent.mkdir(parents=True, exist_ok=True)
+    with open_atomic(ns.dictionary, ns.serialization_encoding) as dictionary_file:
+      unresolved_words, oov_statistics = merge_shards(
+        ns.shards_dir, get_dictionary_writer(dictionary_file, s_options))
+  except ValueError as ex:
+    logger.error(ex)
+    return False
+  except OSError as ex:
+    logger.error("Dictionary couldn't be written.")
+    logger.debug(ex)
+    return False
+
+  logger.info(f"Written dictionary to: \"{ns.dictionary.absolute()}\".")
+  return write_oov_files(unresolved_words, oov_statistics, ns.oov_out, ns.oov_report, ns.oov_report_top)
@@ -0,0 +1,168 @@
+import signal
+import time
+from collections import OrderedDict, deque
+from logging import getLogger
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Deque, Dict, Generator, List, Optional, Tuple
+
+from dict_from_pypinyin.chunking import ChunkAssembler
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.types import Chunk, ChunkPronunciations
+
+REASON_TIMEOUT = "timeout"
+REASON_MEMORY = "memory"
+REASON_EXCEPTION = "exception"
+
+# reason and details why a word couldn't be processed
+QuarantineEntry = Tuple[str, str]
+SupervisedMethod = Callable[[Chunk], Tuple[Chunk, ChunkPronunciations,
+                                           OOVStatistics, Dict[int, QuarantineEntry]]]
+
+
+def get_failure_reason(error: BaseException) -> QuarantineEntry:
+  if isinstance(error, MemoryError):
+    return REASON_MEMORY, "MemoryError"
+  return REASON_EXCEPTION, f"{type(error).__name__}: {error}"
+
+
+def supervised_worker(connection: Connection, method: SupervisedMethod, initializer: Optional[Callable[..., None]], initargs: Tuple[Any, ...]) -> None:
+  if initializer is not None:
+    initializer(*initargs)
+  while True:
+    chunk = connection.recv()
+    if chunk is None:
+      break
+    try:
+      result = method(chunk)
+    except BaseException as error:  # pylint: disable=broad-except
+      connection.send((False, chunk, get_failure_reason(error)))
+    else:
+      connection.send((True, chunk, result))
+  connection.close()
+
+
+class SupervisedProcess():
+  def __init__(self, method: SupervisedMethod, initializer: Optional[Callable[..., None]], initargs: Tuple[Any, ...]) -> None:
+    self.connection, child_connection = Pipe()
+    self.process = Process(
+      target=supervised_worker,
+      args=(child_connection, method, initializer, initargs),
+      daemon=True,
+    )
+    self.process.start()
+    child_connection.close()
+    self.task: Optional[Tuple[Chunk, Chunk]] = None
+    self.deadline: Optional[float] = None
+    self.n_tasks = 0
+
+  def assign(self, parent_chunk: Chunk, chunk: Chunk, timeout: Optional[float]) -> None:
+    self.task = parent_chunk, chunk
+    self.deadline = None if timeout is None else time.monotonic() + timeout
+    self.n_tasks += 1
+    self.connection.send(chunk)
+
+  def stop(self) -> None:
+    if self.task is None and self.process.is_alive():
+      try:
+        self.connection.send(None)
+      except (BrokenPipeError, OSError):
+        pass
+      self.process.join(1)
+    if self.process.is_alive():
+      self.process.kill()
+      self.process.join()
+    self.connection.close()
+
+
+def get_pronunciations_supervised(method: SupervisedMethod, chunks: List[Chunk], n_jobs: int, chunk_timeout: Optional[float], maxtasksperchild: Optional[int], initializer: Optional[Callable[..., None]], initargs: Tuple[Any, ...], quarantine: Dict[int, QuarantineEntry]) -> Generator[Tuple[Chunk, ChunkPronunciations, OOVStatistics], None, None]:
+  """
+  Processes the chunks in separate worker processes and yields them in order of completion.
+  Chunks whose worker raises an exception, exceeds `chunk_timeout` or dies are split in half and retried until the offending words are isolated; those words are added to `quarantine` (index -> reason and details) and get no pronunciations.
+  """
+  logger = getLogger(__name__)
+  todo: Deque[Tuple[Chunk, Chunk]] = deque((chunk, chunk) for chunk in chunks)
+  assembler = ChunkAssembler(chunks)
+  processes: List[SupervisedProcess] = []
+
+  def fail(parent_chunk: Chunk, chunk: Chunk, reason: QuarantineEntry) -> Optional[Tuple[Chunk, ChunkPronunciations, OOVStatistics]]:
+    start, end = chunk
+    if end - start == 1:
+      logger.debug(f"Quarantined word {start} ({reason[0]}): {reason[1]}")
+      quarantine[start] = reason
+      return assembler.add(parent_chunk, chunk, [OrderedDict()], OOVStatistics())
+    middle = start + (end - start) // 2
+    logger.debug(f"Chunk {chunk} failed ({reason[0]}), retrying as {(start, middle)} and {(middle, end)}.")
+    todo.appendleft((parent_chunk, (middle, end)))
+    todo.appendleft((parent_chunk, (start, middle)))
+    return None
+
+  def replace(process: SupervisedProcess) -> None:
+    process.task = None
+    process.stop()
+    processes[processes.index(process)] = SupervisedProcess(method, initializer, initargs)
+
+  try:
+    for _ in range(min(n_jobs, len(chunks))):
+      processes.append(SupervisedProcess(method, initializer, initargs))
+
+    while len(todo) > 0 or any(process.task is not None for process in processes):
+      for process_i, process in enumerate(processes):
+        if process.task is None and len(todo) > 0:
+          if not process.process.is_alive():
+            replace(process)
+            process = processes[process_i]
+          parent_chunk, chunk = todo.popleft()
+          process.assign(parent_chunk, chunk, chunk_timeout)
+
+      busy = [process for process in processes if process.task is not None]
+      deadlines = [process.deadline for process in busy if process.deadline is not None]
+      timeout = None if len(deadlines) == 0 else max(0, min(deadlines) - time.monotonic())
+      ready = wait(
+        [process.connection for process in busy] + [process.process.sentinel for process in busy],
+        timeout,
+      )
+
+      for process in busy:
+        parent_chunk, chunk = process.task
+        finished = None
+        if process.connection in ready:
+          try:
+            success, _, result = process.connection.recv()
+          except (EOFError, OSError):
+            success, result = False, None
+          if success:
+            process.task = None
+            _, chunk_pronunciations, chunk_oov_statistics, failures = result
+            for word_i, reason in failures.items():
+              logger.debug(f"Quarantined word {word_i} ({reason[0]}): {reason[1]}")
+              quarantine[word_i] = reason
+            finished = assembler.add(parent_chunk, chunk, chunk_pronunciations, chunk_oov_statistics)
+            if maxtasksperchild is not None and process.n_tasks >= maxtasksperchild:
+              replace(process)
+          else:
+            if result is None:
+              process.process.join(1)
+              result = get_exit_reason(process.process.exitcode)
+            replace(process)
+            finished = fail(parent_chunk, chunk, result)
+        elif process.process.sentinel in ready:
+          process.process.join()
+          reason = get_exit_reason(process.process.exitcode)
+          replace(process)
+          finished = fail(parent_chunk, chunk, reason)
+        elif process.deadline is not None and time.monotonic() >= process.deadline:
+          replace(process)
+          finished = fail(parent_chunk, chunk, (REASON_TIMEOUT, f"Exceeded {chunk_timeout}s"))
+        if finished is not None:
+          yield finished
+  finally:
+    for process in processes:
+      process.stop()
+
+
+def get_exit_reason(exitcode: Optional[int]) -> QuarantineEntry:
+  # the OOM killer terminates processes with SIGKILL (not available on Windows)
+  if hasattr(signal, "SIGKILL") and exitcode == -signal.SIGKILL:
+    return REASON_MEMORY, "Worker was killed"
+  return REASON_EXCEPTION, f"Worker exited with code {exitcode}"
@@ -1,11 +1,20 @@
 import itertools
-from typing import Tuple
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 
 from ordered_set import OrderedSet
 from pypinyin import Style, pinyin
 
+from dict_from_pypinyin.frequencies import get_reading_probabilities, iterate_pruned_combinations
 
-def word_to_pinyin(word: str, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool) -> OrderedSet[Tuple[str, ...]]:
+
+class SyllableTranscriptionError(ValueError):
+  def __init__(self, syllable: str) -> None:
+    super().__init__(f"Syllable \"{syllable}\" couldn't be transcribed!")
+    self.syllable = syllable
+
+
+def get_syllables_pinyins(word: str, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool) -> List[List[str]]:
   assert isinstance(word, str)
   assert len(word) > 0
 
@@ -16,12 +25,12 @@ def word_to_pinyin(word: str, style: Style, v_to_u: bool, strict: bool, neutral_
                                 errors='ignore', strict=strict,
                                 v_to_u=v_to_u, neutral_tone_with_five=neutral_tone_with_five)
     except ValueError as error:
-      raise ValueError(f"Syllable \"{syllable}\" couldn't be transcribed!") from error
+      raise SyllableTranscriptionError(syllable) from error
     except TypeError as error:
-      raise ValueError(f"Syllable \"{syllable}\" couldn't be transcribed!") from error
+      raise SyllableTranscriptionError(syllable) from error
 
     if len(syllable_pinyins) != 1 or len(syllable_pinyins[0]) == 0:
-      raise ValueError(f"Syllable \"{syllable}\" couldn't be transcribed!")
+      raise SyllableTranscriptionError(syllable)
 
     # if [syllable] == syllable_pinyins[0]:
     #   raise ValueError(f"Syllable \"{syllable}\" couldn't be transcribed!")
@@ -32,6 +41,11 @@ def word_to_pinyin(word: str, style: Style, v_to_u: bool, strict: bool, neutral_
 
     heteronyms = syllable_pinyins[0]
     syllables_pinyins.append(heteronyms)
+  return syllables_pinyins
+
+
+def word_to_pinyin(word: str, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool) -> OrderedSet[Tuple[str, ...]]:
+  syllables_pinyins = get_syllables_pinyins(word, style, v_to_u, strict, neutral_tone_with_five)
 
   all_syllable_combinations = OrderedSet(
     combination
@@ -41,6 +55,40 @@ def word_to_pinyin(word: str, style: Style, v_to_u: bool, strict: bool, neutral_
   return all_syllable_combinations
 
 
+def word_to_weighted_pinyin(word: str, style: Style, v_to_u: bool, strict: bool, neutral_tone_with_five: bool, top_k: Optional[int], cumulative_probability: Optional[float]) -> "OrderedDict[Tuple[str, ...], float]":
+  """
+  Returns the pinyin combinations of the word together with their probability in descending order of probability; the probability of a heteronym is estimated from its frequency in the phrases of pypinyin.
+  Only the `top_k` most probable combinations or the most probable combinations until their probabilities sum up to `cumulative_probability` are returned.
+  """
+  syllables_pinyins = get_syllables_pinyins(word, style, v_to_u, strict, neutral_tone_with_five)
+
+  syllables_probabilities = []
+  for syllable, heteronyms in zip(word, syllables_pinyins):
+    probabilities = get_reading_probabilities(
+      syllable, tuple(heteronyms), style, v_to_u, strict, neutral_tone_with_five)
+    # heteronyms which are equal after the conversion into the style are merged
+    heteronyms_probabilities: OrderedDict[str, float] = OrderedDict()
+    for heteronym, probability in zip(heteronyms, probabilities):
+      heteronyms_probabilities[heteronym] = heteronyms_probabilities.get(
+        heteronym, 0.0) + probability
+    # stable sort keeps the order of pypinyin for equal probabilities
+    syllables_probabilities.append(
+      sorted(heteronyms_probabilities.items(), key=lambda item: -item[1]))
+
+  result: OrderedDict[Tuple[str, ...], float] = OrderedDict()
+  combinations = iterate_pruned_combinations([
+    [probability for _, probability in syllable_probabilities]
+    for syllable_probabilities in syllables_probabilities
+  ], top_k, cumulative_probability)
+  for indices, probability in combinations:
+    combination = tuple(
+      syllable_probabilities[index][0]
+      for index, syllable_probabilities in zip(indices, syllables_probabilities)
+    )
+    result[combination] = probability
+  return result
+
+
 # def word_to_pinyin_v2(word: str) -> OrderedSet[Tuple[str, ...]]:
 #   assert isinstance(word, str)
 #   assert len(word) > 0
@@ -0,0 +1,12 @@
+from typing import Callable, List, Tuple
+
+from pronunciation_dictionary import Pronunciations, Word
+
+from dict_from_pypinyin.oov import OOVStatistics
+
+# start (incl.) and end (excl.) index of the words in the vocabulary
+Chunk = Tuple[int, int]
+ChunkPronunciations = List[Pronunciations]
+ChunkResult = Tuple[Chunk, ChunkPronunciations, OOVStatistics]
+# receives the resolved words in order of the vocabulary
+Writer = Callable[[Word, Pronunciations], None]
@@ -0,0 +1,86 @@
+import math
+import mmap
+from functools import partial
+from multiprocessing.pool import Pool
+from pathlib import Path
+from typing import List, Tuple
+
+from ordered_set import OrderedSet
+from pronunciation_dictionary import Word
+
+# size of the parts the file is split into (if possible); bounds the text that is decoded at once
+MIN_RANGE_SIZE = 8 * 1024**2
+
+# start (incl.) and end (excl.) byte of a part of the file
+ByteRange = Tuple[int, int]
+
+
+def is_newline_splittable(encoding: str) -> bool:
+  """ returns True if the encoded text can be split on the newline byte, i.e., for ASCII-compatible encodings """
+  try:
+    return "\n".encode(encoding) == b"\n"
+  except LookupError:
+    return False
+
+
+def get_line_ranges(content: mmap.mmap, n_ranges: int) -> List[ByteRange]:
+  """ splits the content into at most `n_ranges` parts of similar size that each end after a newline (except the last one) """
+  size = len(content)
+  result = []
+  start = 0
+  for range_i in range(1, n_ranges):
+    end = content.find(b"\n", max(start, size * range_i // n_ranges))
+    if end == -1:
+      break
+    end += 1
+    if end > start:
+      result.append((start, end))
+      start = end
+  if start < size or len(result) == 0:
+    result.append((start, size))
+  return result
+
+
+def decode_lines(content: mmap.mmap, encoding: str, byte_range: ByteRange) -> List[Word]:
+  start, end = byte_range
+  return content[start:end].decode(encoding).splitlines()
+
+
+def decode_unique_lines(content: mmap.mmap, encoding: str, byte_range: ByteRange) -> List[Word]:
+  """ returns the lines of the part without duplicates in order of their first occurrence """
+  # deduplicating in C first limits the slower additions to the OrderedSet to the distinct lines of the part
+  return list(dict.fromkeys(decode_lines(content, encoding, byte_range)))
+
+
+def read_unique_lines(path: Path, encoding: str, byte_range: ByteRange) -> List[Word]:
+  with path.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+    return decode_unique_lines(content, encoding, byte_range)
+
+
+def read_vocabulary(path: Path, encoding: str, n_jobs: int) -> OrderedSet[Word]:
+  """
+  Reads the lines of the file (split like `str.splitlines`) without duplicates in order of their first occurrence.
+  The file is memory-mapped and, if its encoding is ASCII-compatible, split on newlines into parts that are decoded one after another or, if there are multiple jobs, in parallel; therefore, the whole text is never decoded at once.
+  """
+  result: OrderedSet[Word] = OrderedSet()
+  with path.open("rb") as file:
+    if path.stat().st_size == 0:
+      return result
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+      n_ranges = 1
+      if is_newline_splittable(encoding):
+        n_ranges = math.ceil(len(content) / MIN_RANGE_SIZE)
+      byte_ranges = get_line_ranges(content, n_ranges)
+      parallel = n_jobs > 1 and len(byte_ranges) > 1
+      if not parallel:
+        for byte_range in byte_ranges:
+          result.update(decode_unique_lines(content, encoding, byte_range))
+
+  if parallel:
+    with Pool(processes=min(n_jobs, len(byte_ranges))) as pool:
+      # the parts are merged in order as soon as they are available
+      method = partial(read_unique_lines, path, encoding)
+      for range_words in pool.imap(method, byte_ranges):
+        result.update(range_words)
+        del range_words
+  return result
@@ -0,0 +1,58 @@
+"""
+Compares transcribing hyphenated compounds with `word_to_pronunciation.get_pronunciations_from_word` (each part is looked up again for each word) to the compound engine with its cache of parts, e.g.:
+python -m dict_from_pypinyin_debug.benchmark_compounds --words 100000 --parts 2000
+"""
+import argparse
+import random
+import time
+from functools import partial
+from pathlib import Path
+
+from pypinyin import Style
+from word_to_pronunciation import Options, get_pronunciations_from_word
+
+from dict_from_pypinyin import core
+from dict_from_pypinyin.core import get_word_pronunciations, lookup_in_model
+
+HANZI_PATH = Path(__file__).parent.parent.parent / "res" / "hanzi-syllables.txt"
+
+
+def get_compounds(n_words: int, n_parts: int, seed: int) -> list:
+  hanzi = HANZI_PATH.read_text("UTF-8").splitlines()
+  rng = random.Random(seed)
+  parts = ["".join(rng.choices(hanzi, k=rng.randint(1, 2))) for _ in range(n_parts)]
+  return [
+    "-".join(rng.choices(parts, k=rng.randint(2, 4)))
+    for _ in range(n_words)
+  ]
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--words", type=int, default=50_000)
+  parser.add_argument("--parts", type=int, default=2_000, help="amount of distinct parts the compounds are built of")
+  parser.add_argument("--seed", type=int, default=1111)
+  args = parser.parse_args()
+
+  words = get_compounds(args.words, args.parts, args.seed)
+  options = Options("", True, False, False, 1.0)
+  settings = (Style.TONE3, True, True, True, 1.0)
+
+  start = time.perf_counter()
+  lookup = partial(lookup_in_model, style=settings[0], v_to_u=settings[1], strict=settings[2],
+                   neutral_tone_with_five=settings[3], weight=settings[4])
+  expected = [get_pronunciations_from_word(word, lookup, options) for word in words]
+  duration = time.perf_counter() - start
+  print(f"get_pronunciations_from_word: {duration:.2f}s ({len(words) / duration:.0f} words/s)")
+
+  core.part_lookups.clear()
+  start = time.perf_counter()
+  result = [get_word_pronunciations(word, *settings, options) for word in words]
+  duration = time.perf_counter() - start
+  cache_info = next(iter(core.part_lookups.values())).cache_info()
+  print(f"compound engine: {duration:.2f}s ({len(words) / duration:.0f} words/s, {cache_info.hits} cache hits, {cache_info.misses} misses)")
+  assert result == expected
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,50 @@
+"""
+Compares the process and the thread engine.
+Run it with a standard and a free-threaded interpreter (e.g., python3.13t), e.g.:
+(free-threaded interpreters are newer than the supported Python versions, i.e., the package needs to be installed there with --ignore-requires-python)
+python -m dict_from_pypinyin_debug.benchmark_engines --words 200000 --n-jobs 8
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from ordered_set import OrderedSet
+
+from dict_from_pypinyin import Engine, ExecutionOptions, convert_chinese_to_pinyin
+
+HANZI_PATH = Path(__file__).parent.parent.parent / "res" / "hanzi-syllables.txt"
+
+
+def get_vocabulary(n_words: int, seed: int) -> OrderedSet:
+  hanzi = HANZI_PATH.read_text("UTF-8").splitlines()
+  rng = random.Random(seed)
+  result = OrderedSet()
+  while len(result) < n_words:
+    result.add("".join(rng.choices(hanzi, k=rng.randint(1, 4))))
+  return result
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--words", type=int, default=100_000)
+  parser.add_argument("--n-jobs", type=int, default=4)
+  parser.add_argument("--chunksize", type=int, default=2_000)
+  parser.add_argument("--seed", type=int, default=1111)
+  args = parser.parse_args()
+
+  gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+  print(f"Python {sys.version.split()[0]} (GIL {'enabled' if gil_enabled else 'disabled'})")
+  vocabulary = get_vocabulary(args.words, args.seed)
+
+  for engine in Engine:
+    start = time.perf_counter()
+    convert_chinese_to_pinyin(vocabulary, n_jobs=args.n_jobs, chunksize=args.chunksize,
+                              execution=ExecutionOptions(engine=engine))
+    duration = time.perf_counter() - start
+    print(f"{engine.name}: {duration:.2f}s ({len(vocabulary) / duration:.0f} words/s)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,84 @@
+"""
+Compares reading the vocabulary with `Path.read_text` and `OrderedSet(splitlines())` to `read_vocabulary`.
+Each method is measured in a fresh interpreter so that the peak memory usages don't influence each other, e.g.:
+python -m dict_from_pypinyin_debug.benchmark_vocabulary_reading --words 10000000 --n-jobs 8
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from ordered_set import OrderedSet
+
+from dict_from_pypinyin.memory import get_peak_rss
+from dict_from_pypinyin.vocabulary import read_vocabulary
+
+HANZI_PATH = Path(__file__).parent.parent.parent / "res" / "hanzi-syllables.txt"
+METHODS = ("read_text", "read_vocabulary")
+
+
+def create_vocabulary_file(path: Path, n_words: int, duplicates: float, seed: int) -> None:
+  hanzi = HANZI_PATH.read_text("UTF-8").splitlines()
+  rng = random.Random(seed)
+  words = []
+  with path.open("w", encoding="UTF-8") as file:
+    for _ in range(n_words):
+      if len(words) > 0 and rng.random() < duplicates:
+        word = rng.choice(words)
+      else:
+        word = "".join(rng.choices(hanzi, k=rng.randint(1, 4)))
+        if len(words) < 100_000:
+          words.append(word)
+      file.write(f"{word}\n")
+
+
+def measure(method: str, path: Path, n_jobs: int) -> None:
+  start = time.perf_counter()
+  if method == "read_text":
+    result = OrderedSet(path.read_text("UTF-8").splitlines())
+  else:
+    result = read_vocabulary(path, "UTF-8", n_jobs)
+  duration = time.perf_counter() - start
+  print(json.dumps({
+    "duration": duration,
+    "words": len(result),
+    "peak_rss": get_peak_rss(),
+    "peak_worker_rss": get_peak_rss(children=True),
+  }))
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--words", type=int, default=5_000_000)
+  parser.add_argument("--duplicates", type=float, default=0.3)
+  parser.add_argument("--n-jobs", type=int, default=4)
+  parser.add_argument("--seed", type=int, default=1111)
+  parser.add_argument("--measure", choices=METHODS, help=argparse.SUPPRESS)
+  parser.add_argument("--path", type=Path, help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.measure is not None:
+    measure(args.measure, args.path, args.n_jobs)
+    return
+
+  with TemporaryDirectory() as directory:
+    path = Path(directory) / "vocabulary.txt"
+    create_vocabulary_file(path, args.words, args.duplicates, args.seed)
+    print(f"File: {path.stat().st_size / 1024**2:.1f} MiB, {args.words} lines")
+    for method in METHODS:
+      output = subprocess.run(
+        [sys.executable, "-m", "dict_from_pypinyin_debug.benchmark_vocabulary_reading",
+         "--measure", method, "--path", str(path), "--n-jobs", str(args.n_jobs)],
+        check=True, capture_output=True, text=True,
+      ).stdout
+      result = json.loads(output)
+      peak_worker_rss = result["peak_worker_rss"] / 1024**2
+      print(f"{method}: {result['duration']:.2f}s, {result['words']} words, peak RSS {result['peak_rss'] / 1024**2:.1f} MiB (largest worker: {peak_worker_rss:.1f} MiB)")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+import pytest
+
+from dict_from_pypinyin.checkpoint import get_chunk_path, load_chunk, save_chunk
+from dict_from_pypinyin.oov import OOVStatistics
+
+
+def test_save_and_load__returns_same_result(tmp_path):
+  pronunciations = [OrderedDict(((("xing2", "-", "chang2"), 0.5), (("hang2",), 1.0))), OrderedDict()]
+  oov_statistics = OOVStatistics()
+  oov_statistics.add(4, "有a", "a")
+  failures = {3: ("exception", "RuntimeError: test")}
+
+  save_chunk(tmp_path, (3, 5), pronunciations, oov_statistics, failures)
+  result_pronunciations, result_oov_statistics, result_failures = load_chunk(tmp_path, (3, 5))
+
+  assert [list(word_pronunciations.items()) for word_pronunciations in result_pronunciations] == [
+    list(word_pronunciations.items()) for word_pronunciations in pronunciations]
+  assert result_oov_statistics.symbol_counts == oov_statistics.symbol_counts
+  assert result_oov_statistics.symbol_examples == oov_statistics.symbol_examples
+  assert result_failures == failures
+
+
+def test_save__stores_no_pickle(tmp_path):
+  save_chunk(tmp_path, (0, 1), [OrderedDict(((("hang2",), 1.0),))], OOVStatistics())
+
+  content = get_chunk_path(tmp_path, (0, 1)).read_bytes()
+
+  assert not content.startswith(b"\x80")
+  assert b"hang2" in content
+
+
+def test_missing_words__raises_value_error(tmp_path):
+  save_chunk(tmp_path, (0, 2), [OrderedDict(), OrderedDict()], OOVStatistics())
+  path = get_chunk_path(tmp_path, (0, 2))
+  path.write_text(path.read_text("UTF-8").rsplit("\n", 2)[0] + "\n", "UTF-8")
+
+  with pytest.raises(ValueError):
+    load_chunk(tmp_path, (0, 2))
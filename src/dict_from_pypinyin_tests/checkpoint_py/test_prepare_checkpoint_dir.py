@@ -0,0 +1,26 @@
+from collections import OrderedDict
+
+from dict_from_pypinyin.checkpoint import (get_manifest, get_saved_chunks, prepare_checkpoint_dir,
+                                           save_chunk)
+from dict_from_pypinyin.oov import OOVStatistics
+
+
+def test_resume__returns_saved_chunks(tmp_path):
+  manifest = get_manifest("hash", 3, 2, {})
+  assert prepare_checkpoint_dir(tmp_path, manifest, resume=False) == set()
+  save_chunk(tmp_path, (0, 2), [OrderedDict(), OrderedDict()], OOVStatistics())
+
+  result = prepare_checkpoint_dir(tmp_path, manifest, resume=True)
+
+  assert result == {(0, 2)}
+
+
+def test_no_resume__removes_saved_chunks(tmp_path):
+  manifest = get_manifest("hash", 3, 2, {})
+  prepare_checkpoint_dir(tmp_path, manifest, resume=False)
+  save_chunk(tmp_path, (0, 2), [OrderedDict(), OrderedDict()], OOVStatistics())
+
+  result = prepare_checkpoint_dir(tmp_path, manifest, resume=False)
+
+  assert result == set()
+  assert get_saved_chunks(tmp_path) == set()
@@ -0,0 +1,59 @@
+import itertools
+from collections import OrderedDict
+
+import pytest
+from word_to_pronunciation import Options, get_pronunciations_from_word
+from word_to_pronunciation.utils import separate_symbols
+
+from dict_from_pypinyin.compounds import get_compound_pronunciations, get_separated_symbols
+
+LOOKUP = {
+  "a": OrderedDict(((("A",), 0.5), (("AA",), 1.0))),
+  "b": OrderedDict(((("B",), 2.0),)),
+  "c": OrderedDict(((("C", "C"), 1.0), (("B",), 3.0))),
+  "a-b": OrderedDict(((("AB",), 1.0),)),
+  "!a": OrderedDict(((("!A",), 1.0),)),
+}
+
+WORDS = ["", "a", "!", "!!", "-", "--", "!-!", "a-b", "a-b-c", "-a-", "a--b", "!a!", "!a-b", "a-x",
+         "x-a", "!-a", "a!-b", "c-c", "!a\n!", "d"]
+
+
+def lookup(word):
+  return LOOKUP.get(word, OrderedDict())
+
+
+@pytest.mark.parametrize("trim_symbols, split_on_hyphen, try_without_trimming, try_without_splitting", list(itertools.product(["", "!"], [False, True], [False, True], [False, True])))
+def test_same_as_get_pronunciations_from_word(trim_symbols, split_on_hyphen, try_without_trimming, try_without_splitting):
+  options = Options(trim_symbols, split_on_hyphen, try_without_trimming, try_without_splitting, 1.5)
+  for word in WORDS:
+    expected = get_pronunciations_from_word(word, lookup, options)
+    result = get_compound_pronunciations(word, lookup, options)
+    assert list(result.items()) == list(expected.items())
+
+
+def test_result_is_a_copy_of_the_lookup_result():
+  options = Options("", False, False, False, 1.0)
+  result = get_compound_pronunciations("a", lookup, options)
+  result[("X",)] = 1.0
+  assert ("X",) not in LOOKUP["a"]
+
+
+def test_get_separated_symbols__same_as_separate_symbols():
+  for word in ["", "!", "!!a", "a!!", "!.a.!", "a.b", ".\n.", "a\n!", "!a\nb!"]:
+    assert get_separated_symbols(word, "!.") == separate_symbols(word, "!.")
+
+
+def test_best_first__returns_combinations_in_descending_order_of_weight():
+  options = Options("", True, False, False, 1.0)
+  expected = get_compound_pronunciations("a-c", lookup, options)
+
+  result = get_compound_pronunciations("a-c", lookup, options, best_first=True)
+
+  assert list(result.items()) == [
+    (("AA", "-", "B"), 3.0),
+    (("A", "-", "B"), 1.5),
+    (("AA", "-", "C", "C"), 1.0),
+    (("A", "-", "C", "C"), 0.5),
+  ]
+  assert dict(result) == dict(expected)
@@ -3,8 +3,14 @@ from collections import OrderedDict
 import pytest
 from ordered_set import OrderedSet
 from pypinyin import Style
+from word_to_pronunciation import Options
 
-from dict_from_pypinyin.core import convert_chinese_to_pinyin
+from dict_from_pypinyin import core, ordering
+from dict_from_pypinyin.core import convert_chinese_to_pinyin, get_word_pronunciations
+from dict_from_pypinyin.engines import Engine
+from dict_from_pypinyin.execution import ExecutionOptions
+from dict_from_pypinyin.report import ConversionReport
+from dict_from_pypinyin.reverse_index import ReverseIndexBuilder
 
 
 def test_component():
@@ -38,3 +44,218 @@ def test_empty():
   result, oov = convert_chinese_to_pinyin(OrderedSet())
   assert result == OrderedDict()
   assert oov == OrderedSet()
+
+
+def test_checkpoint__resume_returns_same_result(tmp_path):
+  vocabulary = OrderedSet(["罷", "abc", "有-罷", "㐻，"])
+  expected = convert_chinese_to_pinyin(vocabulary, n_jobs=1, chunksize=1)
+  result1 = convert_chinese_to_pinyin(vocabulary, n_jobs=1, chunksize=1,
+                                      execution=ExecutionOptions(checkpoint_dir=tmp_path))
+  (tmp_path / "chunk-1-2.jsonl").unlink()
+  result2 = convert_chinese_to_pinyin(vocabulary, n_jobs=1, chunksize=1,
+                                      execution=ExecutionOptions(checkpoint_dir=tmp_path, resume=True))
+  assert result1 == expected
+  assert result2 == expected
+  assert list(result2[0].keys()) == list(expected[0].keys())
+
+
+def test_checkpoint__resume_with_other_options__raises_value_error(tmp_path):
+  vocabulary = OrderedSet(["罷"])
+  convert_chinese_to_pinyin(vocabulary, n_jobs=1, execution=ExecutionOptions(checkpoint_dir=tmp_path))
+  with pytest.raises(ValueError) as error:
+    convert_chinese_to_pinyin(vocabulary, style=Style.TONE, n_jobs=1,
+                              execution=ExecutionOptions(checkpoint_dir=tmp_path, resume=True))
+  assert error.value.args[0] == "Checkpoint was created from a different vocabulary or with different options!"
+
+
+def test_max_memory__returns_same_result():
+  vocabulary = OrderedSet(["罷", "abc", "有-罷", "㐻，", "社会语言学"])
+  expected = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=3)
+  report = ConversionReport()
+
+  # budget is always exceeded, i.e., parts of one word and spilling of all results
+  result = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=3, report=report,
+                                     execution=ExecutionOptions(max_memory=1))
+
+  assert result == expected
+  assert list(result[0].keys()) == list(expected[0].keys())
+  assert report.peak_rss > 0
+
+
+def test_max_memory__does_not_spill_awaited_chunk(monkeypatch):
+  vocabulary = OrderedSet(["罷", "有-罷", "㐻，", "社会语言学"])
+  expected = convert_chinese_to_pinyin(vocabulary, n_jobs=1, chunksize=1)
+  loaded_chunks = []
+  load_chunk = ordering.load_chunk
+  monkeypatch.setattr(ordering, "is_memory_budget_near", lambda max_memory: True)
+  monkeypatch.setattr(ordering, "load_chunk", lambda directory, chunk: loaded_chunks.append(
+    chunk) or load_chunk(directory, chunk))
+
+  # one job completes the chunks in order, i.e., each one is awaited
+  result = convert_chinese_to_pinyin(vocabulary, n_jobs=1, chunksize=1,
+                                     execution=ExecutionOptions(max_memory=1024**3))
+
+  assert result == expected
+  assert loaded_chunks == []
+
+
+def test_engine_ends_early__raises_runtime_error(monkeypatch):
+  monkeypatch.setattr(core, "get_ordered_results", lambda *args, **kwargs: iter([]))
+
+  with pytest.raises(RuntimeError) as error:
+    convert_chinese_to_pinyin(OrderedSet(["罷", "有"]), n_jobs=1, chunksize=1)
+  assert error.value.args[0] == "Chunk (0, 1) was not completed!"
+
+
+def test_resume_without_checkpoint_dir__raises_value_error():
+  with pytest.raises(ValueError) as error:
+    convert_chinese_to_pinyin(OrderedSet(["罷"]), execution=ExecutionOptions(resume=True))
+  assert error.value.args[0] == "Resuming requires a checkpoint directory!"
+
+
+def test_oov_statistics__count_first_offending_symbols():
+  report = ConversionReport()
+
+  convert_chinese_to_pinyin(OrderedSet(["abc", "罷a", "有-b", "ab", "罷"]),
+                            n_jobs=2, chunksize=2, report=report)
+
+  assert report.oov_statistics.get_report(4) == {
+    "oov_words": 4,
+    "attributed_oov_words": 4,
+    "distinct_symbols": 2,
+    "symbols": [
+      {"symbol": "a", "codepoint": "U+0061", "count": 3, "examples": ["abc", "罷a", "ab"]},
+      {"symbol": "b", "codepoint": "U+0062", "count": 1, "examples": ["有-b"]},
+    ],
+  }
+
+
+@pytest.mark.parametrize("max_memory", [None, 1])
+def test_thread_engine__returns_same_result(max_memory):
+  vocabulary = OrderedSet(["罷", "abc", "有-罷", "㐻，", "社会语言学"])
+  expected = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=2)
+
+  result = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=2,
+                                     execution=ExecutionOptions(engine=Engine.THREADS, max_memory=max_memory))
+
+  assert result == expected
+  assert list(result[0].keys()) == list(expected[0].keys())
+
+
+def test_prefiltered_words__have_same_result_as_lookup():
+  vocabulary = OrderedSet(["", "!!", "-", "--", "!-!", "a-b", "123", "罷", "a罷", "!罷!", "-罷"])
+  options = Options(".!", True, False, False, 0.5)
+  expected_dict = OrderedDict()
+  expected_oov = OrderedSet()
+  for word in vocabulary:
+    pronunciations = get_word_pronunciations(word, Style.TONE3, True, True, True, 0.5, options)
+    if len(pronunciations) == 0:
+      expected_oov.add(word)
+    else:
+      expected_dict[word] = pronunciations
+
+  result, oov = convert_chinese_to_pinyin(vocabulary, Style.TONE3, True, True, True, 0.5, {".", "!"},
+                                          True, 2, None, 2)
+
+  assert list(result.items()) == list(expected_dict.items())
+  assert list(oov) == list(expected_oov)
+
+
+def test_weight_by_frequency__multiplies_weight_and_prunes_per_word():
+  vocabulary = OrderedSet(["行长", "行长-行长", "行长-行长-行长", "abc"])
+
+  result, oov = convert_chinese_to_pinyin(vocabulary, weight=2.0, n_jobs=1, weight_by_frequency=True,
+                                          top_k=2)
+
+  assert len(result["行长"]) == 2
+  assert list(result["行长"].keys())[0] == ("xing2", "chang2")
+  assert sum(result["行长"].values()) < 2.0
+  assert len(result["行长-行长"]) == 2
+  assert list(result["行长-行长"].keys())[0] == ("xing2", "chang2", "-", "xing2", "chang2")
+  assert list(result["行长-行长"].values()) == sorted(result["行长-行长"].values(), reverse=True)
+  assert len(result["行长-行长-行长"]) == 2
+  assert oov == OrderedSet(["abc"])
+
+
+def test_cumulative_probability__prunes_combinations_of_parts():
+  vocabulary = OrderedSet(["行长-行长"])
+
+  unpruned, _ = convert_chinese_to_pinyin(vocabulary, n_jobs=1, weight_by_frequency=True)
+  result, _ = convert_chinese_to_pinyin(vocabulary, n_jobs=1, weight_by_frequency=True,
+                                        cumulative_probability=0.5)
+
+  assert 0 < len(result["行长-行长"]) < len(unpruned["行长-行长"])
+  assert list(result["行长-行长"].items()) == sorted(
+    unpruned["行长-行长"].items(), key=lambda item: -item[1])[:len(result["行长-行长"])]
+
+
+def test_weight_by_frequency_without_pruning__orders_combinations_of_parts_by_weight():
+  vocabulary = OrderedSet(["行长-行长", "行长-行长-行长"])
+
+  result, _ = convert_chinese_to_pinyin(vocabulary, n_jobs=1, weight_by_frequency=True)
+
+  for word in vocabulary:
+    assert len(result[word]) > 2
+    assert list(result[word].values()) == sorted(result[word].values(), reverse=True)
+
+
+def test_pruning_without_weight_by_frequency__raises_value_error():
+  with pytest.raises(ValueError) as error:
+    convert_chinese_to_pinyin(OrderedSet(["行长"]), top_k=2)
+  assert error.value.args[0] == "Pruning requires weighting by frequency!"
+
+
+@pytest.mark.parametrize("max_buffered_chunks", [None, 1])
+def test_writer__receives_dictionary_in_vocabulary_order(max_buffered_chunks):
+  vocabulary = OrderedSet(["罷", "abc", "有-罷", "㐻，", "社会语言学", "a", "-", "行长"])
+  expected = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=1)
+  written = []
+
+  result = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=1,
+                                     writer=lambda word, pronunciations: written.append((word, pronunciations)),
+                                     execution=ExecutionOptions(max_buffered_chunks=max_buffered_chunks))
+
+  assert written == list(expected[0].items())
+  assert result == (OrderedDict(), expected[1])
+
+
+def test_cached_parts__keep_oov_symbols():
+  report = ConversionReport()
+
+  result, oov = convert_chinese_to_pinyin(OrderedSet(["罷-有a", "有-有a", "有a", "罷-有"]),
+                                          n_jobs=1, chunksize=10, report=report)
+
+  assert list(result.keys()) == ["罷-有"]
+  assert oov == OrderedSet(["罷-有a", "有-有a", "有a"])
+  assert report.oov_statistics.symbol_counts == {"a": 3}
+
+
+def test_reverse_index__contains_resolved_words_by_vocabulary_index():
+  vocabulary = OrderedSet(["行", "a", "行-长", "航", "长"])
+  builder = ReverseIndexBuilder()
+
+  result, _ = convert_chinese_to_pinyin(vocabulary, n_jobs=1, chunksize=2, reverse_index=builder)
+  reverse_index = builder.build(toneless=True)
+
+  assert reverse_index.get_indexed_words() == list(result.keys())
+  assert reverse_index.get_words(("xing2",)) == ["行"]
+  assert reverse_index.get_word_ids(("hang",), toneless=True) == [0, 3]
+  assert reverse_index.get_words(("hang2", "-", "zhang3")) == ["行-长"]
+
+
+def test_try_without_trimming__counts_oov_symbol_of_trimmed_word():
+  report = ConversionReport()
+
+  convert_chinese_to_pinyin(OrderedSet(["「罷a」"]), trim_symbols={"「", "」"},
+                            try_without_trimming=True, n_jobs=1, report=report)
+
+  assert report.oov_statistics.symbol_counts == {"a": 1}
+
+
+def test_try_without_splitting__counts_oov_symbol_of_part():
+  report = ConversionReport()
+
+  convert_chinese_to_pinyin(OrderedSet(["罷-有a"]), split_on_hyphen=True,
+                            try_without_splitting=True, n_jobs=1, report=report)
+
+  assert report.oov_statistics.symbol_counts == {"a": 1}
@@ -0,0 +1,28 @@
+import pytest
+
+from dict_from_pypinyin.main import open_atomic
+
+
+def test_completed__replaces_file(tmp_path):
+  path = tmp_path / "result.dict"
+  path.write_text("old", "UTF-8")
+
+  with open_atomic(path, "UTF-8") as file:
+    file.write("new")
+    assert path.read_text("UTF-8") == "old"
+
+  assert path.read_text("UTF-8") == "new"
+  assert list(tmp_path.iterdir()) == [path]
+
+
+def test_exception__keeps_file_and_removes_temporary_file(tmp_path):
+  path = tmp_path / "result.dict"
+  path.write_text("old", "UTF-8")
+
+  with pytest.raises(ValueError):
+    with open_atomic(path, "UTF-8") as file:
+      file.write("new")
+      raise ValueError()
+
+  assert path.read_text("UTF-8") == "old"
+  assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,27 @@
+from collections import OrderedDict
+
+from dict_from_pypinyin.memory import CHUNK_SHARE, estimate_size, get_chunksize_within_budget
+
+
+def test_empty_sample__returns_chunksize():
+  assert get_chunksize_within_budget(1, 100, []) == 100
+
+
+def test_results_exceed_budget__returns_fitting_chunksize():
+  sample = [OrderedDict(((("ba4",), 1.0),))] * 10
+  bytes_per_word = estimate_size(sample) / len(sample)
+  max_memory = int(5.5 * bytes_per_word / CHUNK_SHARE)
+
+  assert get_chunksize_within_budget(max_memory, 100, sample) == 5
+
+
+def test_budget_below_one_word__returns_one():
+  sample = [OrderedDict(((("ba4",), 1.0),))]
+
+  assert get_chunksize_within_budget(1, 100, sample) == 1
+
+
+def test_results_fit_into_budget__returns_chunksize():
+  sample = [OrderedDict(((("ba4",), 1.0),))]
+
+  assert get_chunksize_within_budget(1024**3, 100, sample) == 100
@@ -0,0 +1,27 @@
+from dict_from_pypinyin.memory import MIN_PART_BUDGET, get_max_workers
+
+
+def test_unknown_worker_rss__returns_n_jobs():
+  assert get_max_workers(1, 4, None) == 4
+
+
+def test_workers_exceed_budget__returns_fitting_amount():
+  worker_rss = 100 * 1024**2
+  max_memory = 2 * 3 * (worker_rss + MIN_PART_BUDGET)
+
+  assert get_max_workers(max_memory, 8, worker_rss) == 3
+
+
+def test_budget_below_one_worker__returns_one():
+  assert get_max_workers(1, 8, 100 * 1024**2) == 1
+
+
+def test_budget_above_all_workers__returns_n_jobs():
+  assert get_max_workers(1024**4, 8, 100 * 1024**2) == 8
+
+
+def test_worker_exceeds_budget__logs_warning(caplog):
+  worker_rss = 100 * 1024**2
+
+  assert get_max_workers(worker_rss, 8, worker_rss) == 1
+  assert "doesn't fit into the memory budget" in caplog.text
@@ -0,0 +1,16 @@
+from dict_from_pypinyin.memory import IN_FLIGHT_SHARE, MIN_PART_BUDGET, get_part_budget
+
+
+def test_workers_fit_into_budget__returns_remaining_share_per_worker():
+  worker_rss = 100 * 1024**2
+  max_memory = round((2 * worker_rss + 2 * 4 * MIN_PART_BUDGET) / IN_FLIGHT_SHARE)
+
+  assert get_part_budget(max_memory, 2, worker_rss) == 4 * MIN_PART_BUDGET
+
+
+def test_worker_exceeds_budget__returns_min_part_budget():
+  worker_rss = 100 * 1024**2
+  max_memory = worker_rss
+
+  assert worker_rss > IN_FLIGHT_SHARE * max_memory
+  assert get_part_budget(max_memory, 1, worker_rss) == MIN_PART_BUDGET
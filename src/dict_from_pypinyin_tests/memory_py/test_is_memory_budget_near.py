@@ -0,0 +1,29 @@
+import builtins
+
+from dict_from_pypinyin import memory
+from dict_from_pypinyin.memory import get_current_rss, is_memory_budget_near
+
+
+def test_budget_exceeded__returns_true(monkeypatch):
+  monkeypatch.setattr(memory, "get_current_rss", lambda: 100)
+
+  assert is_memory_budget_near(100)
+
+
+def test_budget_not_exceeded__returns_false(monkeypatch):
+  monkeypatch.setattr(memory, "get_current_rss", lambda: 10)
+
+  assert not is_memory_budget_near(100)
+
+
+def test_without_proc__returns_false_even_if_peak_exceeded_budget(monkeypatch):
+  original_open = builtins.open
+
+  def open_without_proc(file, *args, **kwargs):
+    if str(file).startswith("/proc/"):
+      raise FileNotFoundError(file)
+    return original_open(file, *args, **kwargs)
+  monkeypatch.setattr(builtins, "open", open_without_proc)
+
+  assert get_current_rss() is None
+  assert not is_memory_budget_near(1)
@@ -0,0 +1,20 @@
+from dict_from_pypinyin.oov import OOVStatistics
+
+
+def test_update__is_independent_of_merge_order():
+  first = OOVStatistics()
+  first.add(0, "a1", "a")
+  first.add(1, "b1", "b")
+  second = OOVStatistics()
+  second.add(2, "a2", "a")
+
+  result1 = OOVStatistics()
+  result1.update(second)
+  result1.update(first)
+  result2 = OOVStatistics()
+  result2.update(first)
+  result2.update(second)
+
+  assert result1.get_report(3) == result2.get_report(3)
+  assert result1.symbol_counts == {"a": 2, "b": 1}
+  assert result1.symbol_examples["a"] == [(0, "a1"), (2, "a2")]
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+from pytest import raises
+
+from dict_from_pypinyin import ordering
+from dict_from_pypinyin.checkpoint import load_chunk
+from dict_from_pypinyin.oov import OOVStatistics
+from dict_from_pypinyin.ordering import ChunkMerger, ReorderStatistics
+
+
+def get_result(chunk):
+  start, end = chunk
+  return chunk, [OrderedDict([((str(word_i),), 1.0)]) for word_i in range(start, end)], OOVStatistics()
+
+
+def test_reverse_completion__yields_in_order_and_saves_with_failures(tmp_path):
+  chunks = [(0, 1), (1, 2), (2, 3)]
+  quarantine = {1: ("exception", "RuntimeError: test")}
+  statistics = ReorderStatistics()
+  merger = ChunkMerger(chunks, statistics, quarantine, set(), checkpoint_dir=tmp_path)
+  received = []
+
+  result = list(merger.merge(iter([get_result(chunk) for chunk in reversed(chunks)]),
+                             on_received=received.append))
+
+  assert [chunk_result[0] for chunk_result in result] == chunks
+  assert [chunk_result[1] for chunk_result in result] == [get_result(chunk)[1] for chunk in chunks]
+  assert received == list(reversed(chunks))
+  assert statistics.max_buffered_chunks == 2
+  assert load_chunk(tmp_path, (1, 2))[2] == quarantine
+  assert load_chunk(tmp_path, (0, 1))[2] == {}
+
+
+def test_budget_near__spills_waiting_chunks_but_not_awaited_one(tmp_path, monkeypatch):
+  chunks = [(0, 1), (1, 2), (2, 3)]
+  monkeypatch.setattr(ordering, "is_memory_budget_near", lambda max_memory: True)
+  merger = ChunkMerger(chunks, ReorderStatistics(), {}, set(), max_memory=1, spill_dir=tmp_path)
+  results = iter([get_result((2, 3)), get_result((1, 2)), get_result((0, 1))])
+
+  result = list(merger.merge(results))
+
+  assert [chunk_result[1] for chunk_result in result] == [get_result(chunk)[1] for chunk in chunks]
+  # the awaited chunk was consumed right away, the others were spilled
+  assert sorted(path.name for path in tmp_path.iterdir()) == ["chunk-1-2.jsonl", "chunk-2-3.jsonl"]
+
+
+def test_results_end_early__raises_runtime_error():
+  merger = ChunkMerger([(0, 1), (1, 2)], ReorderStatistics(), {}, set())
+
+  with raises(RuntimeError) as error:
+    list(merger.merge(iter([get_result((0, 1))])))
+  assert error.value.args[0] == "Chunk (1, 2) was not completed!"
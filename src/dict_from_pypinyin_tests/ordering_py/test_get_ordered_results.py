@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from pytest import raises
+
+from dict_from_pypinyin.engines import get_executor_submit_method
+from dict_from_pypinyin.ordering import ReorderStatistics, get_ordered_results
+
+
+def test_reverse_completion__yields_in_order_with_bounded_buffer():
+  chunks = [(i, i + 1) for i in range(12)]
+  lock = Lock()
+  outstanding = []
+  max_outstanding = []
+
+  def method(chunk):
+    # later chunks complete earlier
+    time.sleep(0.01 * (12 - chunk[0]))
+    return chunk, [], None
+
+  def submit(chunk, callback, error_callback):
+    with lock:
+      outstanding.append(chunk)
+      max_outstanding.append(len(outstanding))
+    executor_submit(chunk, callback, error_callback)
+
+  statistics = ReorderStatistics()
+  with ThreadPoolExecutor(max_workers=4) as executor:
+    executor_submit = get_executor_submit_method(executor, method)
+    result = []
+    for chunk_result in get_ordered_results(submit, chunks, 4, statistics):
+      result.append(chunk_result[0])
+      with lock:
+        outstanding.remove(chunk_result[0])
+
+  assert result == chunks
+  assert max(max_outstanding) <= 4
+  assert statistics.head_of_line_wait > 0
+  assert 0 < statistics.max_buffered_chunks < 4
+
+
+def test_error__is_raised():
+  def method(chunk):
+    raise ValueError("test")
+
+  with ThreadPoolExecutor(max_workers=2) as executor:
+    submit = get_executor_submit_method(executor, method)
+    with raises(ValueError):
+      list(get_ordered_results(submit, [(0, 1), (1, 2)], 2, ReorderStatistics()))
+
+
+def test_on_completed__is_called_before_waiting_for_earlier_chunk():
+  chunks = [(i, i + 1) for i in range(4)]
+  completed = []
+
+  def method(chunk):
+    # the first chunk completes last
+    time.sleep(0.2 if chunk[0] == 0 else 0.01)
+    return chunk, [], None
+
+  with ThreadPoolExecutor(max_workers=4) as executor:
+    submit = get_executor_submit_method(executor, method)
+    results = get_ordered_results(submit, chunks, 4, ReorderStatistics(),
+                                  on_completed=lambda result: completed.append(result[0]))
+    first = next(results)
+    completed_before_first = list(completed)
+    rest = list(results)
+
+  assert first[0] == (0, 1)
+  assert sorted(completed_before_first) == chunks
+  assert [result[0] for result in rest] == chunks[1:]
+  assert sorted(completed) == chunks
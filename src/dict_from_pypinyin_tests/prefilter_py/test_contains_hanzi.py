@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+from pypinyin import Style, pinyin
+
+from dict_from_pypinyin.prefilter import HANZI_RANGES, contains_hanzi
+
+# not part of the package, i.e., only available in the repository
+HANZI_PATH = Path(__file__).parent.parent.parent.parent / "res" / "hanzi-syllables.txt"
+
+
+@pytest.mark.skipif(not HANZI_PATH.is_file(), reason="requires the resources of the repository")
+def test_hanzi_syllables__are_all_contained():
+  hanzi = HANZI_PATH.read_text("UTF-8").splitlines()
+  assert all(contains_hanzi(h) for h in hanzi)
+
+
+def test_symbols_outside_of_ranges__can_not_be_transcribed():
+  for codepoint in range(0x20, HANZI_RANGES[-1][1] + 1):
+    symbol = chr(codepoint)
+    if 0xD800 <= codepoint <= 0xDFFF or contains_hanzi(symbol):
+      continue
+    try:
+      result = pinyin(symbol, style=Style.TONE, heteronym=True, errors='ignore', strict=True)
+    except (ValueError, TypeError):
+      continue
+    assert len(result) != 1 or len(result[0]) == 0, hex(codepoint)
+
+
+def test_mixed_word__contains_hanzi():
+  assert contains_hanzi("abc罷")
+  assert not contains_hanzi("abc-123？")
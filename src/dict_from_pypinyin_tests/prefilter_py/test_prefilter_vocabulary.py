@@ -0,0 +1,23 @@
+from word_to_pronunciation import Options
+
+from dict_from_pypinyin.prefilter import prefilter_vocabulary
+
+
+def test_try_without_trimming__counts_oov_symbol_of_trimmed_word():
+  options = Options("!", False, True, False, 1.0)
+
+  _, _, _, oov_statistics = prefilter_vocabulary(["!abc!"], options)
+
+  assert oov_statistics.symbol_counts == {"a": 1}
+
+
+def test_hanzi_word__is_dispatched():
+  options = Options("!", False, True, False, 1.0)
+
+  dispatched_words, dispatched_indices, pronunciations, oov_statistics = prefilter_vocabulary(
+    ["abc", "罷!"], options)
+
+  assert dispatched_words == ["罷!"]
+  assert list(dispatched_indices) == [1]
+  assert pronunciations == {}
+  assert oov_statistics.symbol_counts == {"a": 1}
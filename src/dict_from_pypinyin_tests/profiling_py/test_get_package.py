@@ -0,0 +1,42 @@
+import json
+import sys
+
+import pypinyin
+
+from dict_from_pypinyin import core
+from dict_from_pypinyin.profiling import get_package
+
+
+def test_built_in__returns_none():
+  assert get_package("~") is None
+
+
+def test_this_package__returns_module():
+  assert get_package(core.__file__) == "dict_from_pypinyin.core"
+
+
+def test_site_packages__returns_package():
+  assert get_package("/usr/lib/python3.11/site-packages/pypinyin/core.py") == "pypinyin"
+
+
+def test_dist_packages__returns_package():
+  assert get_package("/usr/lib/python3/dist-packages/pypinyin/core.py") == "pypinyin"
+
+
+def test_imported_module__returns_package():
+  assert get_package(pypinyin.__file__) == "pypinyin"
+
+
+def test_imported_module_outside_of_packages_dir__returns_package(tmp_path, monkeypatch):
+  (tmp_path / "custom_module.py").write_text("", "UTF-8")
+  monkeypatch.syspath_prepend(str(tmp_path))
+  import custom_module  # pylint: disable=import-outside-toplevel,import-error
+
+  try:
+    assert get_package(custom_module.__file__) == "custom_module"
+  finally:
+    del sys.modules["custom_module"]
+
+
+def test_stdlib__returns_python():
+  assert get_package(json.__file__) == "python"
@@ -0,0 +1,25 @@
+from ordered_set import OrderedSet
+
+from dict_from_pypinyin.core import convert_chinese_to_pinyin
+from dict_from_pypinyin.execution import ExecutionOptions
+from dict_from_pypinyin.profiling import (COLLAPSED_STACKS_FILE_NAME, PROFILE_FILE_NAME,
+                                          REPORT_FILE_NAME, merge_profiles)
+
+
+def test_profiled_conversion__writes_merged_profile(tmp_path):
+  vocabulary = OrderedSet(["罷", "abc", "有-罷", "社会语言学"] + [f"行长{i}" for i in range(200)])
+  expected = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=50)
+
+  result = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=50, execution=ExecutionOptions(
+    profile_dir=tmp_path, profile_collapsed_stacks=True))
+
+  assert result == expected
+  assert (tmp_path / PROFILE_FILE_NAME).is_file()
+  report = (tmp_path / REPORT_FILE_NAME).read_text("UTF-8")
+  assert "pypinyin" in report
+  stacks = (tmp_path / COLLAPSED_STACKS_FILE_NAME).read_text("UTF-8").splitlines()
+  assert all(line.startswith("dict_from_pypinyin.core:") for line in stacks)
+
+
+def test_no_chunks__returns_false(tmp_path):
+  assert not merge_profiles(tmp_path)
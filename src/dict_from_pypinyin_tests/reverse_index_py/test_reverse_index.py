@@ -0,0 +1,133 @@
+from collections import OrderedDict
+
+import pytest
+
+from dict_from_pypinyin.reverse_index import (ReverseIndexBuilder, get_toneless_symbol,
+                                              load_reverse_index)
+
+
+def get_builder() -> ReverseIndexBuilder:
+  builder = ReverseIndexBuilder()
+  builder.add(0, "行", OrderedDict(((("hang2",), 1.0), (("xing2",), 1.0))))
+  builder.add(2, "行长", OrderedDict(((("hang2", "zhang3"), 1.0),)))
+  builder.add(3, "航", OrderedDict(((("hang2",), 1.0),)))
+  builder.add(5, "夯", OrderedDict(((("hang1",), 1.0), (("ben4",), 1.0))))
+  return builder
+
+
+@pytest.mark.parametrize("symbol, expected", [
+  ("hang2", "hang"),
+  ("lv4", "lv"),
+  ("lǜ", "lü"),
+  ("háng", "hang"),
+  ("ㄌㄩˋ", "ㄌㄩ"),
+  ("люй4", "люй"),
+  ("ˊ", "ˊ"),
+  ("-", "-"),
+])
+def test_get_toneless_symbol(symbol, expected):
+  assert get_toneless_symbol(symbol) == expected
+
+
+def test_get_word_ids():
+  reverse_index = get_builder().build(toneless=False)
+
+  assert reverse_index.get_word_ids(("hang2",)) == [0, 3]
+  assert reverse_index.get_words(("hang2",)) == ["行", "航"]
+  assert reverse_index.get_words(("hang2", "zhang3")) == ["行长"]
+  assert reverse_index.get_word_ids(("hang",)) == []
+  assert reverse_index.get_word_ids(()) == []
+  with pytest.raises(ValueError):
+    reverse_index.get_word_ids(("hang",), toneless=True)
+
+
+def test_get_word_ids__toneless():
+  reverse_index = get_builder().build(toneless=True)
+
+  assert reverse_index.get_word_ids(("hang",), toneless=True) == [0, 3, 5]
+  assert reverse_index.get_word_ids(("hang4",), toneless=True) == [0, 3, 5]
+  assert reverse_index.get_words(("hang", "zhang"), toneless=True) == ["行长"]
+  assert reverse_index.get_word_ids(("hang2",)) == [0, 3]
+
+
+def test_save_and_load__returns_same_index(tmp_path):
+  path = tmp_path / "index" / "reverse.idx"
+  expected = get_builder().build(toneless=True)
+
+  expected.save(path)
+  with load_reverse_index(path) as result:
+    assert result.get_keys() == expected.get_keys()
+    assert result.get_keys(toneless=True) == expected.get_keys(toneless=True)
+    assert result.get_indexed_words() == ["行", "行长", "航", "夯"]
+    assert result.get_words(("hang2", "zhang3")) == ["行长"]
+    assert result.get_words(("hang",), toneless=True) == ["行", "航", "夯"]
+    assert result.get_words(("ben4",)) == ["夯"]
+
+
+def test_save_and_load__empty(tmp_path):
+  path = tmp_path / "reverse.idx"
+
+  ReverseIndexBuilder().build(toneless=False).save(path)
+  with load_reverse_index(path) as result:
+    assert len(result) == 0
+    assert not result.has_toneless_keys
+    assert result.get_word_ids(("hang2",)) == []
+
+
+def test_separator_in_pronunciation__raises_value_error():
+  builder = ReverseIndexBuilder()
+  builder.add(0, "a", OrderedDict(((("a\x1fb",), 1.0),)))
+
+  with pytest.raises(ValueError):
+    builder.build(toneless=False)
+
+
+def test_save__stores_no_pickle(tmp_path):
+  path = tmp_path / "reverse.idx"
+
+  get_builder().build(toneless=True).save(path)
+
+  assert not path.read_bytes().startswith(b"\x80")
+  assert "行长".encode("UTF-8") in path.read_bytes()
+
+
+def test_load_invalid_file__raises_value_error(tmp_path):
+  path = tmp_path / "reverse.idx"
+  path.write_bytes(b"\x80\x05invalid")
+
+  with pytest.raises(ValueError):
+    load_reverse_index(path)
+
+
+def test_save_loaded_index__returns_same_index(tmp_path):
+  get_builder().build(toneless=True).save(tmp_path / "1.idx")
+
+  with load_reverse_index(tmp_path / "1.idx") as reverse_index:
+    reverse_index.save(tmp_path / "2.idx")
+
+  assert (tmp_path / "2.idx").read_bytes() == (tmp_path / "1.idx").read_bytes()
+
+
+def test_close__unmaps_file(tmp_path):
+  path = tmp_path / "reverse.idx"
+  get_builder().build(toneless=True).save(path)
+  reverse_index = load_reverse_index(path)
+  assert reverse_index.get_words(("hang2", "zhang3")) == ["行长"]
+
+  reverse_index.close()
+  reverse_index.close()
+
+  with pytest.raises(ValueError):
+    reverse_index.get_words(("hang2", "zhang3"))
+
+
+def test_save_onto_loaded_file_after_close__replaces_it(tmp_path):
+  path = tmp_path / "reverse.idx"
+  get_builder().build(toneless=True).save(path)
+
+  with load_reverse_index(path) as reverse_index:
+    reverse_index.get_words(("hang2", "zhang3"))
+  ReverseIndexBuilder().build(toneless=False).save(path)
+
+  with load_reverse_index(path) as reverse_index:
+    assert len(reverse_index) == 0
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+
+import pytest
+from ordered_set import OrderedSet
+
+from dict_from_pypinyin.core import convert_chinese_to_pinyin
+from dict_from_pypinyin.report import ConversionReport
+from dict_from_pypinyin.sharding import (get_shard_dir, merge_shards, run_shard, run_shards_locally,
+                                         split_vocabulary)
+
+VOCABULARY = OrderedSet(["罷", "abc", "有-罷", "㐻，", "社会语言学", "a", "-", "行长", "", "有a", "罷a-有"])
+
+
+def merge(shards_dir):
+  written = OrderedDict()
+  unresolved_words, oov_statistics = merge_shards(
+    shards_dir, lambda word, pronunciations: written.__setitem__(word, pronunciations))
+  return written, unresolved_words, oov_statistics
+
+
+def test_shards_in_separate_processes__return_same_result_as_conversion(tmp_path):
+  report = ConversionReport()
+  expected_dict, expected_unresolved = convert_chinese_to_pinyin(
+    VOCABULARY, n_jobs=1, chunksize=2, report=report)
+  split_vocabulary(VOCABULARY, 3, tmp_path)
+
+  failed_shards = run_shards_locally(tmp_path, 2, n_jobs=1, chunksize=2)
+  result_dict, result_unresolved, oov_statistics = merge(tmp_path)
+
+  assert failed_shards == []
+  assert result_dict == expected_dict
+  assert list(result_dict.keys()) == list(expected_dict.keys())
+  assert result_unresolved == expected_unresolved
+  assert oov_statistics.symbol_counts == report.oov_statistics.symbol_counts
+  assert oov_statistics.symbol_examples == report.oov_statistics.symbol_examples
+
+
+def test_unprocessed_shard__raises_value_error(tmp_path):
+  split_vocabulary(VOCABULARY, 2, tmp_path)
+  run_shard(get_shard_dir(tmp_path, 0), n_jobs=1)
+
+  with pytest.raises(ValueError):
+    merge(tmp_path)
+
+
+def test_shards_with_different_options__raise_value_error(tmp_path):
+  split_vocabulary(VOCABULARY, 2, tmp_path)
+  run_shard(get_shard_dir(tmp_path, 0), n_jobs=1)
+  run_shard(get_shard_dir(tmp_path, 1), n_jobs=1, split_on_hyphen=False)
+
+  with pytest.raises(ValueError):
+    merge(tmp_path)
+
+
+def test_shard_of_other_split__raises_value_error(tmp_path):
+  split_vocabulary(VOCABULARY, 2, tmp_path / "1")
+  split_vocabulary(OrderedSet(["罷"]), 2, tmp_path / "2")
+  for shard in range(2):
+    run_shard(get_shard_dir(tmp_path / "1", shard), n_jobs=1)
+  get_shard_dir(tmp_path / "1", 1).rename(tmp_path / "old")
+  get_shard_dir(tmp_path / "2", 1).rename(get_shard_dir(tmp_path / "1", 1))
+
+  with pytest.raises(ValueError):
+    merge(tmp_path / "1")
+
+
+def test_failing_shard__is_returned_and_others_are_processed(tmp_path):
+  split_vocabulary(VOCABULARY, 3, tmp_path)
+  (get_shard_dir(tmp_path, 1) / "vocabulary.txt").write_text("", "UTF-8")
+
+  failed_shards = run_shards_locally(tmp_path, 2, n_jobs=1)
+
+  assert failed_shards == [1]
+  assert (get_shard_dir(tmp_path, 0) / "result.json").is_file()
+  assert (get_shard_dir(tmp_path, 2) / "result.json").is_file()
+
+
+def test_results__are_parsed_instead_of_unpickled(tmp_path):
+  split_vocabulary(VOCABULARY, 1, tmp_path)
+  shard_dir = get_shard_dir(tmp_path, 0)
+  run_shard(shard_dir, n_jobs=1)
+  assert list(shard_dir.glob("*.pkl")) == []
+  dictionary_path = shard_dir / "dictionary.jsonl"
+  assert dictionary_path.read_text("UTF-8").splitlines()[0] == '["罷", [[["ba4"], 1.0], [["pi2"], 1.0], [["pi4"], 1.0], [["bi3"], 1.0], [["ba5"], 1.0], [["bai3"], 1.0]]]'
+
+  dictionary_path.write_bytes(b"\x80\x05N.")
+
+  with pytest.raises(ValueError):
+    merge(tmp_path)
+
+
+def test_invalid_oov_statistics__raise_value_error(tmp_path):
+  split_vocabulary(VOCABULARY, 1, tmp_path)
+  shard_dir = get_shard_dir(tmp_path, 0)
+  run_shard(shard_dir, n_jobs=1)
+  (shard_dir / "oov-statistics.json").write_text('{"symbol_counts": {"a": "1"}, "symbol_examples": {}}', "UTF-8")
+
+  with pytest.raises(ValueError):
+    merge(tmp_path)
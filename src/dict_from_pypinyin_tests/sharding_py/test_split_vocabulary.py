@@ -0,0 +1,37 @@
+import pytest
+from ordered_set import OrderedSet
+
+from dict_from_pypinyin.sharding import (get_shard_dir, iterate_indices, iterate_words,
+                                         split_vocabulary)
+
+
+def test_shards_contain_words_in_order_with_their_indices(tmp_path):
+  vocabulary = OrderedSet(["行", "", "a b", "长\r", "社会", "x"] + [f"w{i}" for i in range(100)])
+
+  result = split_vocabulary(vocabulary, 3, tmp_path)
+
+  assert sum(result) == len(vocabulary)
+  words_of_shards = []
+  for shard in range(3):
+    shard_dir = get_shard_dir(tmp_path, shard)
+    words = list(iterate_words(shard_dir / "vocabulary.txt"))
+    indices = list(iterate_indices(shard_dir / "indices.bin"))
+    assert len(words) == result[shard]
+    assert indices == sorted(indices)
+    assert words == [vocabulary[word_i] for word_i in indices]
+    words_of_shards.append(words)
+  assert sorted(word for words in words_of_shards for word in words) == sorted(vocabulary)
+
+
+def test_same_word_is_in_same_shard(tmp_path):
+  split_vocabulary(OrderedSet(["a", "行", "b"]), 4, tmp_path / "1")
+  split_vocabulary(OrderedSet(["行", "c"]), 4, tmp_path / "2")
+
+  shards_1 = [list(iterate_words(get_shard_dir(tmp_path / "1", shard) / "vocabulary.txt")) for shard in range(4)]
+  shards_2 = [list(iterate_words(get_shard_dir(tmp_path / "2", shard) / "vocabulary.txt")) for shard in range(4)]
+  assert [("行" in words) for words in shards_1] == [("行" in words) for words in shards_2]
+
+
+def test_word_with_line_break__raises_value_error(tmp_path):
+  with pytest.raises(ValueError):
+    split_vocabulary(OrderedSet(["a\nb"]), 2, tmp_path)
@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from multiprocessing import get_start_method
+
+import pytest
+from ordered_set import OrderedSet
+
+from dict_from_pypinyin import core
+from dict_from_pypinyin.core import convert_chinese_to_pinyin
+from dict_from_pypinyin.execution import ExecutionOptions
+from dict_from_pypinyin.report import ConversionReport
+
+# the patched transcription is only inherited by forked workers
+pytestmark = pytest.mark.skipif(get_start_method() != "fork", reason="requires fork")
+
+
+def patched_word_to_pinyin(word, *args):
+  if word == "有":
+    raise RuntimeError("test")
+  if word == "罷":
+    time.sleep(30)
+  return OrderedSet([("x",)])
+
+
+def test_exception_and_timeout__are_quarantined(monkeypatch):
+  monkeypatch.setattr(core, "word_to_pinyin", patched_word_to_pinyin)
+  report = ConversionReport()
+
+  result, oov = convert_chinese_to_pinyin(
+    OrderedSet(["一", "有", "二", "罷", "三"]), n_jobs=2, chunksize=5, report=report,
+    execution=ExecutionOptions(supervised=True, chunk_timeout=1.0))
+
+  assert list(result.keys()) == ["一", "二", "三"]
+  assert oov == OrderedSet(["有", "罷"])
+  assert report.quarantined_words == OrderedDict([
+    ("有", ("exception", "RuntimeError: test")),
+    ("罷", ("timeout", "Exceeded 1.0s")),
+  ])
+
+
+def test_resume__restores_quarantined_words(monkeypatch, tmp_path):
+  monkeypatch.setattr(core, "word_to_pinyin", patched_word_to_pinyin)
+  vocabulary = OrderedSet(["一", "有", "二", "三"])
+  convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=2,
+                            execution=ExecutionOptions(supervised=True, checkpoint_dir=tmp_path))
+  report = ConversionReport()
+
+  result, oov = convert_chinese_to_pinyin(
+    vocabulary, n_jobs=2, chunksize=2, report=report,
+    execution=ExecutionOptions(supervised=True, checkpoint_dir=tmp_path, resume=True))
+
+  assert list(result.keys()) == ["一", "二", "三"]
+  assert oov == OrderedSet(["有"])
+  assert report.quarantined_words == OrderedDict([
+    ("有", ("exception", "RuntimeError: test")),
+  ])
+
+
+def test_without_failures__returns_same_result_as_unsupervised():
+  vocabulary = OrderedSet(["罷", "abc", "有-罷", "㐻，"])
+  expected = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=1)
+  report = ConversionReport()
+
+  result = convert_chinese_to_pinyin(vocabulary, n_jobs=2, chunksize=1, report=report,
+                                     execution=ExecutionOptions(supervised=True))
+
+  assert result == expected
+  assert report.quarantined_words == OrderedDict()
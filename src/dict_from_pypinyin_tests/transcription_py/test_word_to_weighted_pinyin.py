@@ -0,0 +1,45 @@
+import itertools
+
+from pytest import approx
+
+from dict_from_pypinyin.transcription import Style, word_to_pinyin, word_to_weighted_pinyin
+
+
+def test_行长__most_frequent_reading_is_first():
+  res = word_to_weighted_pinyin("行长", style=Style.TONE3, v_to_u=True, strict=True,
+                                neutral_tone_with_five=True, top_k=None, cumulative_probability=None)
+  assert list(res.keys())[0] == ("xing2", "chang2")
+  assert sum(res.values()) == approx(1.0)
+  assert list(res.values()) == sorted(res.values(), reverse=True)
+
+
+def test_no_pruning__returns_all_combinations():
+  for word in ["罷", "行长", "重还"]:
+    expected = word_to_pinyin(word, style=Style.TONE3, v_to_u=True, strict=True,
+                              neutral_tone_with_five=True)
+    res = word_to_weighted_pinyin(word, style=Style.TONE3, v_to_u=True, strict=True,
+                                  neutral_tone_with_five=True, top_k=None, cumulative_probability=None)
+    assert set(res.keys()) == set(expected)
+
+
+def test_top_k__returns_most_probable_combinations():
+  full = word_to_weighted_pinyin("行长重", style=Style.TONE3, v_to_u=True, strict=True,
+                                 neutral_tone_with_five=True, top_k=None, cumulative_probability=None)
+  res = word_to_weighted_pinyin("行长重", style=Style.TONE3, v_to_u=True, strict=True,
+                                neutral_tone_with_five=True, top_k=3, cumulative_probability=None)
+  assert list(res.items()) == list(itertools.islice(full.items(), 3))
+
+
+def test_cumulative_probability__stops_when_reached():
+  res = word_to_weighted_pinyin("行长", style=Style.TONE3, v_to_u=True, strict=True,
+                                neutral_tone_with_five=True, top_k=None, cumulative_probability=0.8)
+  probabilities = list(res.values())
+  assert sum(probabilities) >= 0.8
+  assert sum(probabilities[:-1]) < 0.8
+
+
+def test_style_normal__merges_equal_heteronyms():
+  res = word_to_weighted_pinyin("罷", style=Style.NORMAL, v_to_u=True, strict=True,
+                                neutral_tone_with_five=True, top_k=None, cumulative_probability=None)
+  assert set(res.keys()) == {("ba",), ("pi",), ("bi",), ("bai",)}
+  assert sum(res.values()) == approx(1.0)
@@ -0,0 +1,36 @@
+import pytest
+from ordered_set import OrderedSet
+
+from dict_from_pypinyin import vocabulary
+from dict_from_pypinyin.vocabulary import read_vocabulary
+
+CONTENT = "罷\r\n有-罷\n\nabc\r罷\n社会 语言学\n有-罷\nabc\n\n行长\x85罷\n行长"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "gb18030", "utf-16"])
+@pytest.mark.parametrize("n_jobs", [1, 3])
+def test_same_as_read_text(tmp_path, monkeypatch, encoding, n_jobs):
+  monkeypatch.setattr(vocabulary, "MIN_RANGE_SIZE", 4)
+  content = CONTENT if encoding != "gb18030" else CONTENT.replace(" ", "").replace("\x85", "")
+  path = tmp_path / "vocabulary.txt"
+  path.write_bytes(content.encode(encoding))
+  expected = OrderedSet(path.read_text(encoding).splitlines())
+
+  result = read_vocabulary(path, encoding, n_jobs)
+
+  assert list(result) == list(expected)
+  assert result == expected
+  assert all(result.index(word) == i for i, word in enumerate(expected))
+
+
+def test_empty_file__returns_empty_set(tmp_path):
+  path = tmp_path / "vocabulary.txt"
+  path.write_bytes(b"")
+  assert read_vocabulary(path, "utf-8", 2) == OrderedSet()
+
+
+def test_invalid_content__raises_unicode_decode_error(tmp_path):
+  path = tmp_path / "vocabulary.txt"
+  path.write_bytes(b"abc\n\xff\n")
+  with pytest.raises(UnicodeDecodeError):
+    read_vocabulary(path, "utf-8", 1)